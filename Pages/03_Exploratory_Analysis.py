@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
 from PIL import Image
+from tobacco import figures, maps, panels, prices
 
 st.set_page_config(
     page_title="QUIT – Global Tobacco Control",
@@ -29,49 +27,8 @@ st.markdown("To better understand patterns in tobacco control and smoking preval
 # -------------------------------------------
 # Load Data
 # -------------------------------------------
-@st.cache_data
-def load_age_standard_data():
-    df = pd.read_csv("Data/Non_age_standardised_smoking_prevalence.csv")
-    df = df.rename(columns={
-        "Unnamed: 0": "Region",
-        "Unnamed: 1": "Year",
-        "Estimate of current tobacco use prevalence (%)": "Overall use",
-        "Estimate of current tobacco use prevalence (%).1": "Male",
-        "Estimate of current tobacco use prevalence (%).2": "Female"
-    })
-    df = df.drop(index=0)
-    df = df[["Region", "Year", "Overall use", "Male", "Female"]].copy()
-    for col in ["Overall use", "Male", "Female"]:
-        df[col] = df[col].str.split(" ").str[0].astype(float)
-    df["Year"] = df["Year"].astype(int)
-    return df
-
-@st.cache_data
-def load_mpower_data():
-    emp = pd.read_csv("Data/MPOWER.csv")
-    emp = emp.rename(columns={
-        "Countries, territories and areas": "Region",
-        "Protect from tobacco smoke": "exposure_protect",
-        "Offer help to quit tobacco use": "cessation_support",
-        "Warn about the dangers of tobacco": "risk_warning",
-        "Enforce bans on tobacco advertising": "advertisement_ban",
-        "Raise taxes on tobacco": "tax_increase",
-        "Anti-tobacco mass media campaigns": "media_campaign"
-    })
-    policies = ['exposure_protect', 'cessation_support', 'risk_warning', 'advertisement_ban', 'tax_increase', 'media_campaign']
-    for policy in policies:
-        emp[policy] = pd.to_numeric(emp[policy], errors='coerce')
-    emp = emp[emp["Year"].isin([2010, 2022])]
-    return emp, policies
-
-@st.cache_data
-def load_price_data():
-    price = pd.read_csv("Data/CleanCigarettePrice.csv")
-    return price
-
-age_df = load_age_standard_data()
-emp, policy_cols = load_mpower_data()
-price_df = load_price_data()
+# Region × year panels: selections below are gathers by region id, not scans of the tables
+store = panels.load_store()
 
 # The rest of your visualizations and interpretation text go here...
 
@@ -81,21 +38,8 @@ st.markdown("---")
 # Graph 1: Global Map
 # -------------------------------------------
 st.markdown("### Global Smoking Prevalence Over Time")
-age_filtered = age_df[(age_df["Year"] >= 2007) & (age_df["Year"] <= 2022)].copy()
-age_filtered = age_filtered.sort_values("Year")
-
-fig_map = px.choropleth(
-    age_filtered,
-    locations="Region",
-    locationmode="country names",
-    color="Overall use",
-    animation_frame="Year",
-    color_continuous_scale="Turbo",
-    range_color=[age_filtered["Overall use"].min(), age_filtered["Overall use"].max()],
-    labels={"Overall use": "Smoking Prevalence (%)"}
-)
-fig_map.update_layout(margin=dict(l=0, r=0, t=0, b=0), width=1000, height=600)
-st.plotly_chart(fig_map)
+# Built once per dataset version with ISO3 locations; frames only carry each year's values
+st.plotly_chart(maps.prevalence_map())
 st.markdown("*This animated choropleth map highlights the changing landscape of smoking prevalence from 2007 to 2022. Red shades indicate high prevalence, while green and blue denote low levels. Most countries follow a downward trend over time.*")
 
 st.markdown("---")
@@ -105,25 +49,16 @@ st.markdown("---")
 # -------------------------------------------
 st.markdown("### Tobacco Use by Group and Over Time")
 group = st.radio("Select group to view:", ["Overall use", "Male", "Female"])
-colors = {"Overall use": "#4169E1", "Male": "#2ECC71", "Female": "#9B59B6"}
 col1, col2 = st.columns(2)
 
+# Charts are rendered once per selection and served from the figure cache
 with col1:
     st.markdown("**Distribution across all years**")
-    fig1, ax1 = plt.subplots(figsize=(6, 4))
-    sns.histplot(age_df[group], kde=True, color=colors[group], ax=ax1)
-    ax1.set_xlabel("Tobacco Use Prevalence (%)")
-    ax1.set_ylabel("Frequency")
-    st.pyplot(fig1)
+    st.image(figures.prevalence_histogram(group), use_container_width=True)
 
 with col2:
     st.markdown("**Trends over time (2000–2030)**")
-    fig2, ax2 = plt.subplots(figsize=(7, 4))
-    sns.boxplot(x="Year", y=group, data=age_df, color=colors[group], ax=ax2)
-    ax2.set_ylabel("Tobacco Use Prevalence (%)")
-    ax2.set_xlabel("Year")
-    ax2.tick_params(axis='x', rotation=45)
-    st.pyplot(fig2)
+    st.image(figures.prevalence_boxplot(group), use_container_width=True)
 
 st.markdown("*These plots highlight differences in tobacco use distribution by gender, and trends over time. Male tobacco use remains significantly higher, with all groups showing a consistent decline over the observed period.*")
 
@@ -135,16 +70,18 @@ st.markdown("---")
 st.markdown("### Tobacco Use Trends by Country")
 
 # Get unique country names from the dataset
-all_countries = sorted(age_df["Region"].unique())
+all_countries = store.available("prevalence")
 
 # User selects countries to compare (default to some top smoking countries)
 selected_countries = st.multiselect("Select countries to compare:", all_countries, default=['Kiribati', 'Myanmar', 'Nepal'])
 
 # Filter dataset based on user selection
-filtered_data = age_df[age_df["Region"].isin(selected_countries)]
+filtered_data = store.frame("prevalence", selected_countries, columns=["Overall use", "Overall use Low", "Overall use High"])
 
-# Create interactive Plotly figure
-fig = px.line(filtered_data, x="Year", y="Overall use", color="Region", 
+# Create interactive Plotly figure, with the WHO uncertainty interval as error bars
+fig = px.line(filtered_data, x="Year", y="Overall use", color="Region",
+              error_y=filtered_data["Overall use High"] - filtered_data["Overall use"],
+              error_y_minus=filtered_data["Overall use"] - filtered_data["Overall use Low"],
               labels={"Overall use": "Prevalence (%)"})
 
 # Display the figure in Streamlit
@@ -159,19 +96,11 @@ st.markdown("---")
 # Graph 4: MPOWER Policy
 # -------------------------------------------
 st.markdown("### MPOWER Policy Implementation Scores")
-unique_countries = sorted(emp["Region"].unique())
+unique_countries = store.available("mpower", years=[2010, 2022])
 selected_countries = st.multiselect("Select countries:", options=unique_countries, default=["India", "New Zealand", "Kenya", "France", "Colombia"])
 selected_year = st.selectbox("Select year:", options=[2010, 2022])
 
-filtered = emp[(emp["Region"].isin(selected_countries)) & (emp["Year"] == selected_year)]
-melted = filtered.melt(id_vars=["Region"], value_vars=policy_cols, var_name="Policy", value_name="Score")
-
-fig4, ax4 = plt.subplots(figsize=(10, 6))
-sns.barplot(data=melted, x="Score", y="Policy", hue="Region", ax=ax4, palette="muted")
-ax4.set_xlabel("Implementation Score (0–5)")
-ax4.set_ylabel("MPOWER Policy")
-ax4.legend(title="Country", bbox_to_anchor=(1.05, 1), loc="upper left")
-st.pyplot(fig4)
+st.image(figures.mpower_scores(tuple(selected_countries), selected_year), use_container_width=True)
 st.markdown("*This visual compares tobacco control policy implementation across countries in 2010 and 2022. Improvements are uneven—risk warnings and smoke-free policies advanced most, while taxation and media campaigns saw limited change.*")
 
 st.markdown("---")
@@ -182,38 +111,19 @@ st.markdown("---")
 st.markdown("### International Cigarette Prices Over Time")
 
 # Region selection
-all_countries = sorted(price_df["Region"].unique())
+price_view = prices.load_view()
 default = ["New Zealand", "Sri Lanka", "Australia"]
-options = ["All countries"] + all_countries
+options = ["All countries"] + list(price_view.regions)
 selection = st.multiselect("Select countries to compare:", options=options, default=default)
 
-# Filter data
-if "All countries" in selection:
-    filtered_price = price_df
-    show_legend = False
-else:
-    filtered_price = price_df[price_df["Region"].isin(selection)]
-    show_legend = True
-
-# Add jitter to Year to reduce overlapping points
-filtered_price["Jittered_Year"] = filtered_price["Year"] + np.random.uniform(-0.5, 0.5, size=len(filtered_price["Year"]))
-
-# Create scatter plot
-fig = px.scatter(
-    filtered_price,
-    x="Jittered_Year",
-    y="Cigarette_price",
-    color="Region",
-    hover_data=["Region", "Cigarette_price"],
-    opacity=0.7
-)
+# Each country's points are gathered from its row of the price panel; the year jitter is seeded, so points stay put across reruns
+fig = price_view.scatter(None if "All countries" in selection else selection)
 
 fig.update_layout(
     width=1000,
     height=600,
     xaxis_title="Year",
-    yaxis_title="Price (International Dollars)",
-    showlegend= show_legend
+    yaxis_title="Price (International Dollars)"
 )
 
 # Display the figure in Streamlit
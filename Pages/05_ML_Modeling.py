@@ -1,17 +1,22 @@
 import streamlit as st
 from PIL import Image
-import pandas as pd
-import json
+from tobacco import model_results
 
+store = model_results.load_store()
 
+LINEAR, TREE, FOREST = "Linear Regression", "Decision Tree Regressor", "Random Forest Regressor"
+ALL = model_results.ALL
 
-file_path = "Data/model.json"
-@st.cache_data
-def load_feature_importance(file_path):
-    with open("Data/model.json", "r") as f:
-        return json.load(f)
 
-feature_importance_data = load_feature_importance("Data/model.json")
+def show_results(columns, importance=None, expand_key=None, title="**Mean Absolute Error (MAE) Scores:**"):
+    """MAE table of the labelled models in ``columns``, then the coefficients of ``importance``."""
+    st.write(title)
+    st.dataframe(store.mae(columns))
+    if importance is not None:
+        df = store.importance(importance)
+        expand = st.checkbox("Show full table", value=False, key=expand_key)
+        st.dataframe(df if expand else df.head())  # Shows only the first 5 rows unless expanded
+
 
 # If you have a banner image for the machine learning section, load it:
 ml_banner = Image.open("Streamlit Pics/MLandStats.png")
@@ -49,63 +54,11 @@ with st.expander("### 🔧 Initial Models"):
             options=["Initial Models", "Without Region", "Without Region or Continent"],
             index=0  
         )
-    if region_select == "Initial Models":
-        st.write("**Performance Metrics (Mean Absolute Error, MAE):**")
-        st.dataframe(pd.DataFrame({
-                "Train": [feature_importance_data["Linear Regression"]["Initial Model"]["Train MAE"],
-                        feature_importance_data["Decision Tree Regressor"]["Initial Model"]["Train MAE"],
-                        feature_importance_data["Random Forest Regressor"]["Initial Model"]["Train MAE"]],
-                "Test":  [feature_importance_data["Linear Regression"]["Initial Model"]["Test MAE"],
-                        feature_importance_data["Decision Tree Regressor"]["Initial Model"]["Test MAE"],
-                        feature_importance_data["Random Forest Regressor"]["Initial Model"]["Test MAE"]]
-            }, index=["Linear Regression", "Decision Tree Regressor", "Random Forest Regressor"]).T)
-        
-        st.write("**Feature Importance:**")
-        feature_importance = feature_importance_data["Linear Regression"]["Initial Model"]["Feature Importance"]
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand = st.checkbox("Show full table", value=False, key="expand")
-        if expand:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head()) 
-
-    if region_select == "Without Region":
-        st.write("**Performance Metrics (Mean Absolute Error, MAE):**")
-        st.dataframe(pd.DataFrame({
-                "Train": [feature_importance_data["Linear Regression"]["Models Without Region"]["Train MAE"],
-                        feature_importance_data["Decision Tree Regressor"]["Models Without Region"]["Train MAE"],
-                        feature_importance_data["Random Forest Regressor"]["Models Without Region"]["Train MAE"]],
-                "Test":  [feature_importance_data["Linear Regression"]["Models Without Region"]["Test MAE"],
-                        feature_importance_data["Decision Tree Regressor"]["Models Without Region"]["Test MAE"],
-                        feature_importance_data["Random Forest Regressor"]["Models Without Region"]["Test MAE"]]
-            }, index=["Linear Regression", "Decision Tree Regressor", "Random Forest Regressor"]).T)
-
-        feature_importance = feature_importance_data["Linear Regression"]["Models Without Region"]["Feature Importance"]
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand1 = st.checkbox("Show full table", value=False, key = "expand1")
-        if expand1:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head())
-
-    if region_select == "Without Region or Continent":
-        st.write("**Performance Metrics (Mean Absolute Error, MAE):**")
-        st.dataframe(pd.DataFrame({
-                "Train": [feature_importance_data["Linear Regression"]["Without Region or Continent"]["Train MAE"],
-                        feature_importance_data["Decision Tree Regressor"]["Without Region or Continent"]["Train MAE"],
-                        feature_importance_data["Random Forest Regressor"]["Without Region or Continent"]["Train MAE"]],
-                "Test":  [feature_importance_data["Linear Regression"]["Without Region or Continent"]["Test MAE"],
-                        feature_importance_data["Decision Tree Regressor"]["Without Region or Continent"]["Test MAE"],
-                        feature_importance_data["Random Forest Regressor"]["Without Region or Continent"]["Test MAE"]]
-            }, index=["Linear Regression", "Decision Tree Regressor", "Random Forest Regressor or Continent"]).T)
-
-        feature_importance = feature_importance_data["Linear Regression"]["Without Region or Continent"]["Feature Importance"]
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand2 = st.checkbox("Show full table", value=False, key = "expand2")
-        if expand2:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head())    
+    experiment = {"Initial Models": "Initial Model", "Without Region": "Models Without Region",
+                  "Without Region or Continent": "Without Region or Continent"}[region_select]
+    show_results([(model, (model, experiment, ALL)) for model in (LINEAR, TREE, FOREST)],
+                 importance=(LINEAR, experiment, ALL), expand_key=f"expand_{experiment}",
+                 title="**Performance Metrics (Mean Absolute Error, MAE):**")
 
 # Expander: Feature Importance & Model Tuning
 with st.expander("### ⚙️ Model Optimisation"):
@@ -129,67 +82,18 @@ with st.expander("### ⚙️ Model Optimisation"):
             options=["Leave One Out Encoded", "K-Means Clustering", "Time Lag Variables", "Hyperparameter Optimisation", "Ridge Regression"],
             index=0  
         )
-    if optimisation_choice == "Leave One Out Encoded":
-        st.write("**Mean Absolute Error (MAE) Scores:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Linear Regression"]["Leave One Out Encoded"]["Train MAE"]],
-            "Test":  [feature_importance_data["Linear Regression"]["Leave One Out Encoded"]["Test MAE"]]
-        }, index=["Leave One Out Encoded"]).T)
+    linear_experiments = {"Leave One Out Encoded": "Leave One Out Encoded", "K-Means Clustering": "Clusters",
+                          "Time Lag Variables": "Lag"}
+    if optimisation_choice in linear_experiments:
+        experiment = (LINEAR, linear_experiments[optimisation_choice], ALL)
+        show_results([(optimisation_choice, experiment)], importance=experiment, expand_key=f"expand_{optimisation_choice}")
 
-        feature_importance = feature_importance_data["Linear Regression"]["Leave One Out Encoded"]["Feature Importance"]
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand3 = st.checkbox("Show full table", value=False)
-        
-
-    # Display first 5 rows by default, or full DataFrame if expanded
-        if expand3:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head())  # Shows only the first 5 rows
-    
-    if optimisation_choice == "K-Means Clustering":
-        st.write("**Mean Absolute Error (MAE) Scores:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Linear Regression"]["Clusters"]["Train MAE"]],
-            "Test":  [feature_importance_data["Linear Regression"]["Clusters"]["Test MAE"]]
-        }, index=["K-Means Clustering"]).T)
-
-        feature_importance = feature_importance_data["Linear Regression"]["Clusters"]["Feature Importance"]
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand4 = st.checkbox("Show full table", value=False, key="expand4")
-        if expand4:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head()) 
-    
-    if optimisation_choice == "Time Lag Variables":
-        st.write("**Mean Absolute Error (MAE) Scores:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Linear Regression"]["Lag"]["Train MAE"]],
-            "Test":  [feature_importance_data["Linear Regression"]["Lag"]["Test MAE"]]
-        }, index=["Time Lag Variables"]).T)
-
-        feature_importance = feature_importance_data["Linear Regression"]["Lag"]["Feature Importance"]
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand5 = st.checkbox("Show full table", value=False, key="expand5")
-        if expand5:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head()) 
-    
     if optimisation_choice == "Hyperparameter Optimisation":
-        st.write("**Mean Absolute Error (MAE) Scores:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Linear Regression"]["Without Region or Continent"]["Train MAE"],
-                      feature_importance_data["Random Forest Regressor"]["Without Region or Continent"]["Train MAE"],
-                      feature_importance_data["Random Forest Regressor"]["Optimised"]["Train MAE"],
-                      feature_importance_data["XGBoost"]["Optmised"]["Train MAE"]],
-            "Test":  [feature_importance_data["Linear Regression"]["Without Region or Continent"]["Test MAE"],
-                      feature_importance_data["Random Forest Regressor"]["Without Region or Continent"]["Test MAE"],
-                      feature_importance_data["Random Forest Regressor"]["Optimised"]["Test MAE"],
-                      feature_importance_data["XGBoost"]["Optmised"]["Test MAE"]]
-        }, index=["Linear Regression", "Random Forest Regressor (Original)", "Random Forest Regressor (Tuned)", "XGBoost (Tuned)"]).T)
-    
+        show_results([("Linear Regression", (LINEAR, "Without Region or Continent", ALL)),
+                      ("Random Forest Regressor (Original)", (FOREST, "Without Region or Continent", ALL)),
+                      ("Random Forest Regressor (Tuned)", (FOREST, "Optimised", ALL)),
+                      ("XGBoost (Tuned)", ("XGBoost", "Optmised", ALL))])
+
     if optimisation_choice == "Ridge Regression":
         Coeffgraph = Image.open("Streamlit Pics/coeffvalue.png")
         st.image(Coeffgraph, use_container_width=False)
@@ -223,33 +127,15 @@ with st.expander("### 🔍 Feature Importance"):
         - **Income group** was **positively** associated with female tobacco use, suggesting cultural or socioeconomic influences.
         """)
         
-        # Display MAE scores for Female and Male
-        st.write("**Mean Absolute Error (MAE) Scores:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Gender"]["Female"]["Train MAE"], feature_importance_data["Gender"]["Male"]["Train MAE"]],
-            "Test": [feature_importance_data["Gender"]["Female"]["Test MAE"], feature_importance_data["Gender"]["Male"]["Test MAE"]]
-        }, index=["Female", "Male"]).T)
-
-         # Dropdown to select feature importance for either Male or Female
+        # Display MAE scores for Female and Male, then the chosen gender's feature importance
         feature_choice = st.selectbox(
             "Select Gender for Feature Importance",
             options=["Female", "Male"],
             index=0  # Default to "Female"
         )
-
-        if feature_choice == "Female":
-            st.subheader(f"Feature Importance for {feature_choice}")
-            feature_importance = feature_importance_data["Gender"]["Female"]["Feature Importance"]
-        elif feature_choice == "Male":
-            st.subheader(f"Feature Importance for {feature_choice}")
-            feature_importance = feature_importance_data["Gender"]["Male"]["Feature Importance"]
-
-        df = pd.DataFrame(feature_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand6 = st.checkbox("Show full table", value=False, key="expand6")
-        if expand6:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head()) 
+        st.subheader(f"Feature Importance for {feature_choice}")
+        show_results([(gender, (LINEAR, "Gender", gender)) for gender in ("Female", "Male")],
+                     importance=(LINEAR, "Gender", feature_choice), expand_key="expand6")
 
     elif stratification_type == "Income Level":
         st.markdown("#### **Tobacco Use by Income Level**")
@@ -261,31 +147,16 @@ with st.expander("### 🔍 Feature Importance"):
         - Counterintuitively, **cigarette prices** were negatively correlated with tobacco use in **high income countries** and positively correlated in **low income countries**. It is possible that black market alternatives may play a greater role in the latter group.
         """)
 
-        # Display MAE scores for Low and High income groups
-        st.write("**Mean Absolute Error (MAE) Scores by Income Level:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Income"]["Low Income Group"]["Train MAE"], 
-                    feature_importance_data["Income"]["High Income Group"]["Train MAE"]],
-            "Test": [feature_importance_data["Income"]["Low Income Group"]["Test MAE"], 
-                    feature_importance_data["Income"]["High Income Group"]["Test MAE"]]
-        }, index=["Low Income Group", "High Income Group"]).T)
-
-        # Radio buttons to select feature importance for Low or High income levels
+        # Display MAE scores for Low and High income groups, then the chosen group's feature importance
         income_choice = st.selectbox(
             "Select Income Level for Feature Importance",
             options=["Low Income Group", "High Income Group"],
             index=0  # Default to "Low"
         )
-
-        # Display the selected feature importance table for the selected income level
         st.subheader(f"Feature Importance for {income_choice}")
-        income_importance = feature_importance_data["Income"][income_choice]["Feature Importance"]
-        df = pd.DataFrame(income_importance.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand7 = st.checkbox("Show full table", value=False, key="expand7")
-        if expand7:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head()) 
+        show_results([(group, (LINEAR, "Income", group)) for group in ("Low Income Group", "High Income Group")],
+                     importance=(LINEAR, "Income", income_choice), expand_key="expand7",
+                     title="**Mean Absolute Error (MAE) Scores by Income Level:**")
 
     elif stratification_type == "Continent":
         st.markdown("#### **Tobacco Use By Continent**")
@@ -297,35 +168,14 @@ with st.expander("### 🔍 Feature Importance"):
         - The importance of **Year** in **South Asia** suggests a natural decline in tobacco use independent of policy interventions, unlike for other continents.
         """)
     
-        st.write("**Mean Absolute Error (MAE) Scores by Continent:**")
-        st.dataframe(pd.DataFrame({
-            "Train": [feature_importance_data["Continent"]["South Asia"]["Train MAE"], 
-                    feature_importance_data["Continent"]["Europe & Central Asia"]["Train MAE"],
-                    feature_importance_data["Continent"]["Middle East & North Africa"]["Train MAE"],
-                    feature_importance_data["Continent"]["East Asia & Pacific"]["Train MAE"],
-                    feature_importance_data["Continent"]["Americas"]["Train MAE"],
-                    feature_importance_data["Continent"]["Sub-Saharan Africa"]["Train MAE"]],
-            "Test": [feature_importance_data["Continent"]["South Asia"]["Test MAE"],
-                     feature_importance_data["Continent"]["Europe & Central Asia"]["Test MAE"],
-                     feature_importance_data["Continent"]["Middle East & North Africa"]["Test MAE"],
-                     feature_importance_data["Continent"]["East Asia & Pacific"]["Test MAE"],
-                     feature_importance_data["Continent"]["Americas"]["Test MAE"],
-                     feature_importance_data["Continent"]["Sub-Saharan Africa"]["Test MAE"]]
-                }, index=["South Asia", "Europe & Central Asia", "Middle East & North Africa", "East Asia & Pacific", "Americas", "Sub-Saharan Africa"]).T)
-        # Radio buttons to select feature importance for Low or High income levels
+        continents = ["South Asia", "Europe & Central Asia", "Middle East & North Africa", "East Asia & Pacific",
+                      "Americas", "Sub-Saharan Africa"]
         continent_choice = st.selectbox(
             "Select Continent for Feature Importance",
-            options=["South Asia", "Europe & Central Asia", "Middle East & North Africa", "East Asia & Pacific", "Americas", "Sub-Saharan Africa"],
+            options=continents,
             index=0  # Default to "South Asia"
         )
-
-        # Display the selected feature importance table for the selected income level
         st.subheader(f"Feature Importance for {continent_choice}")
-        continent_choice = feature_importance_data["Continent"][continent_choice]["Feature Importance"]
-        df = pd.DataFrame(continent_choice.items(), columns=["Feature", "Importance"]).set_index("Feature")
-        expand8 = st.checkbox("Show full table", value=False, key="expand8")
-        if expand8:
-            st.dataframe(df)
-        else:
-            st.dataframe(df.head()) 
-        
\ No newline at end of file
+        show_results([(continent, (LINEAR, "Continent", continent)) for continent in continents],
+                     importance=(LINEAR, "Continent", continent_choice), expand_key="expand8",
+                     title="**Mean Absolute Error (MAE) Scores by Continent:**")
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from tobacco import data, diagnostics, stratified, whatif
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Statistical Analysis Overview", layout="wide")
@@ -44,16 +45,40 @@ if selected_method == "Fixed Effects Regression":
         """)
 
 elif selected_method == "Multicollinearity Check":
+    panel = data.load_statistical_panel()
+    pooled = diagnostics.diagnose(panel)["All"]
+    high = " and ".join(f"**{name.replace('_', ' ').title()}** (VIF = {value:.1f})"
+                        for name, value in pooled.high().items())
     with st.container():
-        st.info("""
+        st.info(f"""
         ### Multicollinearity Check
         Assess whether correlations among predictors inflate standard errors and mask individual policy effects by computing Variance Inflation Factors (VIF).
 
         #### Result
-        * High multicollinearity detected, especially for **Cessation Support** (VIF = 11.3) and **Risk Warnings** (VIF = 10.4).
+        * High multicollinearity detected, especially for {high}.
         * Instead of excluding variables, interaction terms were introduced to capture potential policy synergies.
         """)
 
+    # Diagnostics for any subset of policies, pooled or per stratum
+    vif_columns = st.multiselect("Policies to check:", stratified.POLICIES, default=stratified.POLICIES)
+    vif_stratification = st.selectbox("Stratify by:", list(whatif.STRATIFICATIONS), key="vif_stratification")
+    vif_centered = st.checkbox("Center the policies (model with intercept)")
+    if len(vif_columns) < 2:
+        st.warning("Select at least two policies.")
+    else:
+        results = diagnostics.diagnose(panel, vif_columns, whatif.STRATIFICATIONS[vif_stratification], vif_centered)
+        vif_stratum = st.selectbox("Stratum:", list(results)) if len(results) > 1 else "All"
+        result = results[vif_stratum]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("#### Variance Inflation Factors")
+            st.write(result.table().round(2))
+        with col2:
+            st.markdown("#### Pairwise Correlation")
+            st.write(result.correlation.round(2))
+        st.markdown("#### Condition Indices and Variance-Decomposition Proportions")
+        st.write(result.decomposition().round(2))
+
 elif selected_method == "Interaction Terms":
     with st.container():
         st.info("""
@@ -110,30 +135,55 @@ gender_filter = st.selectbox("Choose gender filter:", [
     "All", "Male", "Female"
 ])
 
-# Table mapping
-table_mapping = {
-    ("None (Pooled)", "All"): "Data/policy_results_pooled.csv",
-    ("None (Pooled)", "Male"): "Data/gender_pooled_male.csv",
-    ("None (Pooled)", "Female"): "Data/gender_pooled_female.csv",
-    ("By Income Group", "All"): "Data/policy_results_income.csv",
-    ("By Continent", "All"): "Data/policy_results_continent.csv",
-    ("By Income Group", "Male"): "Data/gender_income_results.csv",
-    ("By Income Group", "Female"): "Data/gender_income_results.csv",
-    ("By Continent", "Male"): "Data/gender_continent_results.csv",
-    ("By Continent", "Female"): "Data/gender_continent_results.csv"
-}
-
-key = (stratification_level, gender_filter)
-
-if key in table_mapping:
-    try:
-        df_result = pd.read_csv(table_mapping[key])
-        df_result = df_result.set_index(df_result.columns[0])  # Set the first column as index
-        st.write(df_result)  # Use st.write instead of st.dataframe to allow for horizontal scrolling
-    except FileNotFoundError:
-        st.warning("Results table not found. Please upload the file: {}".format(table_mapping[key]))
-else:
-    st.info("This combination is currently not available.")
+# Results store: selections map onto its (stratification, outcome) index
+stratifications = {"None (Pooled)": "Pooled", "By Income Group": "Income Group", "By Continent": "Continent"}
+outcomes = {"All": "Overall_use", "Male": "Male", "Female": "Female"}
+key = (stratifications[stratification_level], outcomes[gender_filter])
+
+p_values = {"Clustered": "P-Value", "Wild cluster bootstrap (9,999 replications)": "Bootstrap P-Value",
+            "Clustered, with WHO prevalence intervals (1,000 draws)": "Uncertainty P-Value"}
+p_value_type = st.radio("P-values:", list(p_values), horizontal=True)
+
+store = stratified.load_store()
+st.markdown("#### Estimated Policy Effects (Coefficient, P-Value)")
+st.write(store.pivot(*key, p_value=p_values[p_value_type]))  # Use st.write instead of st.dataframe to allow for horizontal scrolling
+
+# Written from the same estimates and p-values as the table above
+st.markdown("#### Interpretation")
+st.write(store.notes(*key, p_value=p_values[p_value_type]))
+
+# --- What-If Explorer ---
+st.markdown("### What-If Explorer")
+st.markdown("""
+Fit your own fixed effects model: choose the policies, interaction terms, subgroup and period to include.
+Country and year fixed effects are always absorbed.
+""")
+
+engine = whatif.load_engine()
+cov_labels = {"cluster": "Clustered by country", "HC3": "Robust (HC3)", "nonrobust": "Classical"}
+
+col1, col2 = st.columns(2)
+with col1:
+    whatif_policies = st.multiselect("Policies:", stratified.POLICIES, default=stratified.POLICIES)
+    whatif_interactions = st.multiselect("Interaction terms:", list(whatif.INTERACTIONS), default=["media_warning"])
+    whatif_outcome = st.selectbox("Outcome:", list(outcomes), key="whatif_outcome")
+with col2:
+    whatif_stratification = st.selectbox("Subgroup:", list(stratifications), key="whatif_stratification")
+    whatif_strata = engine.strata(stratifications[whatif_stratification])
+    whatif_stratum = st.selectbox("Stratum:", whatif_strata) if whatif_strata else None
+    whatif_years = st.slider("Years:", *engine.year_range, value=engine.year_range, step=2)
+    whatif_cov = st.radio("Standard errors:", list(cov_labels), format_func=cov_labels.get, horizontal=True)
+
+try:
+    whatif_result = engine.run(outcome=outcomes[whatif_outcome], policies=whatif_policies,
+                               interactions=whatif_interactions,
+                               stratification=stratifications[whatif_stratification], stratum=whatif_stratum,
+                               years=whatif_years, cov_type=whatif_cov)
+    st.markdown(f"**N = {whatif_result.nobs}**, R² = {whatif_result.rsquared:.3f}, "
+                f"within R² = {whatif_result.rsquared_within:.3f}, standard errors: {whatif_result.cov_type}")
+    st.write(whatif_result.table().round(4))
+except ValueError as error:
+    st.warning(f"Cannot fit this selection: {error}")
 
 # --- Key Takeaways and Interpretation ---
 st.markdown("### Key Takeaways and Interpretation")
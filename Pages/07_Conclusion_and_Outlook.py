@@ -1,10 +1,8 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.express as px
 from PIL import Image
+from tobacco import maps
 
 st.set_page_config(
     page_title="QUIT – Global Tobacco Control",
@@ -44,56 +42,7 @@ st.markdown("""
 st.markdown("### Linking Policy Implementation to Impact")
 st.markdown("This heatmap shows where increased policy implementation scores coincide with reduced tobacco use from 2008 to 2022. Green indicates desired policy effects (↑ implementation, ↓ prevalence), while red signals unintended trends.")
 
-@st.cache_data
-def load_effectiveness_data():
-    df = pd.read_csv("Data/merged_tobacco_data.csv")
-    df.columns = [col.strip() for col in df.columns]
-
-    policy_columns = ["Monitor", "exposure_protect", "cessation_support", "risk_warning", "advertisement_ban", "tax_increase", "media_campaign"]
-    df[policy_columns] = df[policy_columns].apply(pd.to_numeric, errors='coerce')
-    df['average_policy'] = df[policy_columns].mean(axis=1)
-
-    df[['average_policy', 'Overall use']] = df[['average_policy', 'Overall use']].apply(pd.to_numeric, errors='coerce')
-    df = df.dropna(subset=['Region', 'Year', 'average_policy', 'Overall use'])
-
-    df_2008 = df[df['Year'] == 2008].set_index('Region')
-    df_2022 = df[df['Year'] == 2022].set_index('Region')
-
-    common_regions = df_2008.index.intersection(df_2022.index)
-    df_2008 = df_2008.loc[common_regions]
-    df_2022 = df_2022.loc[common_regions]
-
-    result_df = pd.DataFrame(index=common_regions)
-    result_df['policy_diff'] = df_2022['average_policy'] - df_2008['average_policy']
-    result_df['prevalence_diff'] = df_2022['Overall use'] - df_2008['Overall use']
-    result_df['effect'] = result_df['policy_diff'].apply(lambda x: "↑" if x > 0 else ("↓" if x < 0 else "=")) + \
-                          result_df['prevalence_diff'].apply(lambda x: "↓" if x < 0 else ("↑" if x > 0 else "="))
-    result_df['Region'] = result_df.index
-    return result_df.reset_index(drop=True)
-
-effect_df = load_effectiveness_data()
-
-color_map = {
-    "↑↓": "green",
-    "↑↑": "red",
-    "↓↓": "orange",
-    "↓↑": "purple",
-    "==": "gray",
-    "↑=": "lightgreen",
-    "↓=": "pink",
-    "=↓": "yellow",
-    "=↑": "lightblue"
-}
-
-fig_effect = px.choropleth(
-    effect_df,
-    locations="Region",
-    locationmode="country names",
-    color="effect",
-    color_discrete_map=color_map
-)
-fig_effect.update_layout(margin=dict(l=0, r=0, t=40, b=0))
-st.plotly_chart(fig_effect, use_container_width=True)
+st.plotly_chart(maps.effect_map(), use_container_width=True)
 
 # -------------------------------------------
 # Policy Implications Section
@@ -0,0 +1,85 @@
+"""Compare tobacco.gapfill with the notebook's row-by-row replace_zero_with_scale.
+
+Run from the repository root::
+
+    python -m benchmarks.gapfill_benchmark [--scales 1 10 100]
+
+For every scale the countries of ``Data/CleanMPOWER.csv`` are copied that many
+times under new names. Both implementations fill all six policy columns, and
+their CSV output is checked to be byte-identical before the timings are printed.
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from tobacco import gapfill
+from tobacco.data import MPOWER_POLICIES
+
+
+def replace_zero_with_scale(group, column):
+    """The loop from TobaccoProjectCleanVizMerge.ipynb, for one column."""
+    for i in range(1, len(group) - 1):  # Avoid the first and last rows
+        year = group.iloc[i]['Year']
+        if group.iloc[i][column] == 0:
+            if year == 2008:
+                prev_value = group[group['Year'] == 2007][column]
+                next_value = group[group['Year'] == 2010][column]
+                if prev_value.values[0] > 0 and next_value.values[0] > 0:
+                    group.iloc[i, group.columns.get_loc(column)] = round((prev_value.values[0] + next_value.values[0]) / 2)
+            elif year == 2022:
+                prev_value = group[group['Year'] == 2020][column]
+                if prev_value.values[0] > 0:
+                    group.iloc[i, group.columns.get_loc(column)] = prev_value.values[0]
+            else:
+                prev_value = group[group['Year'] == year - 2][column]
+                next_value = group[group['Year'] == year + 2][column]
+                if prev_value.values[0] > 0 and next_value.values[0] > 0:
+                    group.iloc[i, group.columns.get_loc(column)] = round((prev_value.values[0] + next_value.values[0]) / 2)
+    return group
+
+
+def loop_fill(emp, columns):
+    parts = []
+    for _, group in emp.groupby("Region", sort=False):
+        group = group.copy()
+        for column in columns:
+            group = replace_zero_with_scale(group, column)
+        parts.append(group)
+    return pd.concat(parts).loc[emp.index]
+
+
+def synthetic(emp, scale):
+    """``emp`` with every country repeated ``scale`` times under distinct names."""
+    if scale == 1:
+        return emp
+    copies = [emp.assign(Region=emp["Region"] + f" #{k}") for k in range(scale)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gap-filling benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    emp = pd.read_csv("Data/CleanMPOWER.csv")
+    print(f"{'countries':>10} {'rows':>8} {'loop s':>10} {'vectorized s':>13} {'speedup':>9}")
+    for scale in args.scales:
+        df = synthetic(emp, scale)
+        expected, loop_seconds = timed(loop_fill, df, MPOWER_POLICIES)
+        result, vec_seconds = timed(gapfill.fill_zero_scores, df, MPOWER_POLICIES)
+        if result.to_csv(index=False) != expected.to_csv(index=False):
+            raise SystemExit(f"outputs differ at scale {scale}")
+        print(f"{df['Region'].nunique():>10} {len(df):>8} {loop_seconds:>10.2f} "
+              f"{vec_seconds:>13.4f} {loop_seconds / vec_seconds:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""The indexed resolver scores names exactly as a full ``extractOne`` scan."""
+
+import pandas as pd
+
+from tobacco import countries, fuzzy, pipeline
+
+
+def test_resolver_matches_a_full_scan():
+    choices = pipeline.load_income_groups("Data/IncomeGroup.csv")["Region"].unique()
+    names = pd.read_csv("Data/MPOWER.csv")["Countries, territories and areas"].unique()
+    resolver = countries.CountryResolver(choices)
+    for name in names:
+        assert resolver.score(name) == fuzzy.extract_one(name, choices), name
+
+
+def test_aliases_override_stored_decisions(tmp_path):
+    choices = ["Kazakhstan", "Kyrgyz Republic"]
+    path = str(tmp_path / "decisions.json")
+    resolver = countries.CountryResolver(choices)
+    resolver.decisions["Kyrgyzstan"] = ("Kazakhstan", 60)
+    resolver.save(path)
+
+    aliased = countries.CountryResolver(choices, aliases={"Kyrgyzstan": "Kyrgyz Republic"})
+    aliased.load(path)
+    assert aliased.decisions == {}
+    assert aliased.resolve("Kyrgyzstan") == "Kyrgyz Republic"
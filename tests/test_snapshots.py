@@ -0,0 +1,24 @@
+"""A table loader returns the same frame from its snapshot as from the CSV."""
+
+import pandas as pd
+import pytest
+
+from tobacco import data, snapshots
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("name", sorted(data.TABLES))
+def test_snapshot_round_trips_the_parsed_frame(name, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    parse, sources = data.TABLES[name]
+    loader = getattr(data, name)
+
+    data.cache_clear()
+    parsed = loader()
+    snapshots.build({name: (parse, sources)})
+    data.cache_clear()
+    mapped = loader()
+
+    assert snapshots.read(name, sources) is not None
+    pd.testing.assert_frame_equal(mapped, parsed)
@@ -0,0 +1 @@
+"""Shared data and analysis code for the QUIT Streamlit pages and notebooks."""
@@ -0,0 +1,131 @@
+"""Indexed country-name resolver for joining WHO and World Bank tables.
+
+The cleaning notebook scored every WHO name against every World Bank
+``Economy`` with ``fuzzywuzzy.process.extractOne``, which is quadratic in
+the number of names. :class:`CountryResolver` gives the same answers with
+three cheaper steps:
+
+1. An alias table of known spellings, then the decisions stored by earlier
+   runs with the same choices, aliases and threshold.
+2. An exact lookup on the normalised name.
+3. WRatio scoring (:func:`tobacco.fuzzy.wratio`) of only the blocked
+   candidates. These are choices that share a word with the name, plus the
+   ``limit`` choices sharing the most character trigrams with it (and any
+   tied with the last of them).
+
+Resolving a table therefore costs roughly one index lookup per name. This
+still holds for thousands of names from sub-national or year-versioned
+classification files.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+
+from tobacco import fuzzy
+
+
+def _trigrams(processed):
+    padded = f" {processed} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CountryResolver:
+    """Match names against a fixed list of ``choices``.
+
+    ``aliases`` maps a name, in any spelling, to a choice and is checked
+    first. Fuzzy matches scoring below ``threshold`` resolve to ``None``.
+    ``decisions`` records every answer as ``name -> (choice, score)``. It can
+    be saved and loaded, so later runs only score names they have not seen.
+    """
+
+    def __init__(self, choices, aliases=None, threshold=90, limit=10):
+        self.choices = list(dict.fromkeys(choices))
+        self.threshold = threshold
+        self.limit = limit
+        self.aliases = {fuzzy.full_process(name): choice for name, choice in (aliases or {}).items()}
+        self.decisions = {}
+
+        self._processed = [fuzzy.full_process(c) for c in self.choices]
+        self._exact = {}
+        self._tokens = defaultdict(list)
+        self._grams = defaultdict(list)
+        for i, processed in enumerate(self._processed):
+            self._exact.setdefault(processed, i)
+            for token in set(processed.split()):
+                self._tokens[token].append(i)
+            for gram in _trigrams(processed):
+                self._grams[gram].append(i)
+
+    @property
+    def digest(self):
+        """Hash of the choices, aliases and threshold that stored decisions are valid for."""
+        digest = hashlib.sha256(str(self.threshold).encode())
+        for choice in self.choices:
+            digest.update(choice.encode() + b"\0")
+        for name, choice in sorted(self.aliases.items()):
+            digest.update(f"{name}\0{choice}\0".encode())
+        return digest.hexdigest()
+
+    def candidates(self, processed):
+        """Indices of the choices worth scoring against ``processed``, in choice order."""
+        found = {i for token in processed.split() for i in self._tokens.get(token, ())}
+        shared = Counter()
+        for gram in _trigrams(processed):
+            shared.update(self._grams.get(gram, ()))
+        # Every choice tied with the limit-th count, so the result does not depend on set order
+        if shared:
+            cutoff = sorted(shared.values(), reverse=True)[:self.limit][-1]
+            found.update(i for i, count in shared.items() if count >= cutoff)
+        return sorted(found)
+
+    def score(self, name):
+        """Return ``(choice, score)`` for the best choice, ignoring the threshold.
+
+        Ties go to the earlier choice, as in ``extractOne``.
+        """
+        processed = fuzzy.full_process(name)
+        if processed in self.aliases:
+            return self.aliases[processed], 100
+        if processed in self._exact:
+            return self.choices[self._exact[processed]], 100
+        best, best_score = None, 0
+        for i in self.candidates(processed):
+            score = fuzzy.wratio(processed, self._processed[i])
+            if score > best_score:
+                best, best_score = self.choices[i], score
+        return best, best_score
+
+    def resolve(self, name):
+        """The matching choice for ``name``, or ``None`` below the threshold.
+
+        Aliases take precedence over stored decisions.
+        """
+        alias = self.aliases.get(fuzzy.full_process(name))
+        if alias is not None:
+            self.decisions[name] = (alias, 100)
+        elif name not in self.decisions:
+            self.decisions[name] = self.score(name)
+        choice, score = self.decisions[name]
+        return choice if score >= self.threshold else None
+
+    def resolve_all(self, names):
+        """Resolve every distinct name and return a ``{name: choice or None}`` dict."""
+        return {name: self.resolve(name) for name in dict.fromkeys(names)}
+
+    def load(self, path):
+        """Add the decisions saved at ``path`` if they were made for the same choices and aliases."""
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get("digest") == self.digest:
+            for name, (choice, score) in saved["decisions"].items():
+                self.decisions.setdefault(name, (choice, score))
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"digest": self.digest, "decisions": self.decisions}, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
@@ -0,0 +1,246 @@
+"""Process-wide, cached access to the tables in ``Data/``.
+
+Every page loads its tables through this module instead of calling
+``pd.read_csv`` itself. Results are kept in a single in-process cache keyed on
+the loader, its arguments and the paths and modification times of the files it
+reads, so all sessions served by one Streamlit process share one parsed copy and
+a rerun only costs a ``stat`` per file.
+
+Table loaders registered with :func:`table` first try a memory-mapped snapshot
+from :mod:`tobacco.snapshots` and only parse the CSV when the snapshot is
+missing or stale. Either way the table comes back through
+:func:`tobacco.snapshots.compact`, with categorical ``Region``/group columns
+and downcast numeric dtypes.
+
+The cached objects are shared: callers must treat them as read-only and copy
+before adding or changing columns.
+"""
+
+import functools
+import json
+import os
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from tobacco import estimates, snapshots
+
+DATA_DIR = "Data"
+
+PREVALENCE_GROUPS = ["Overall use", "Male", "Female"]
+
+MPOWER_POLICIES = ["exposure_protect", "cessation_support", "risk_warning",
+                   "advertisement_ban", "tax_increase", "media_campaign"]
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "entries"])
+
+TABLES = {}
+
+# This module and the tobacco modules its parsers call
+PARSER_SOURCES = [os.path.abspath(path) for path in (__file__, estimates.__file__, snapshots.__file__)]
+
+_cache = {}
+_lock = threading.RLock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def data_path(name):
+    """Return the path of ``name`` inside the data directory."""
+    return os.path.join(DATA_DIR, name)
+
+
+def _stamp(paths):
+    # A missing optional file stamps as None, so creating it invalidates the cache
+    return tuple((path, os.stat(path).st_mtime_ns if os.path.exists(path) else None) for path in paths)
+
+
+def version(*names):
+    """A stamp of the data files ``names`` that changes whenever any of them is rewritten."""
+    return _stamp([data_path(name) for name in names])
+
+
+def cached(*files):
+    """Cache a loader process-wide, invalidated when any of ``files`` changes.
+
+    The decorated function may take hashable positional arguments; any
+    argument that names a file is stamped as well, so ``load_csv(path)``
+    reloads when ``path`` changes on disk.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            paths = list(files) + [a for a in args if isinstance(a, str) and os.path.isfile(a)]
+            stamp = _stamp(paths)
+            key = (func.__module__, func.__qualname__, args)
+            with _lock:
+                entry = _cache.get(key)
+                if entry is not None and entry[0] == stamp:
+                    _stats["hits"] += 1
+                    return entry[1]
+                _stats["misses"] += 1
+                value = func(*args)
+                _cache[key] = (stamp, value)
+                return value
+        return wrapper
+    return decorator
+
+
+def table(*files):
+    """Register a table loader parsing ``files`` from the data directory.
+
+    The loader is cached like :func:`cached` and served from its snapshot when
+    one is current; the undecorated parser is kept in ``TABLES`` for the
+    snapshot build step.
+    """
+    paths = [data_path(f) for f in files]
+
+    def decorator(parse):
+        # A snapshot is also stale once the parser or a module it uses changes
+        sources = paths + PARSER_SOURCES
+        TABLES[parse.__name__] = (parse, sources)
+
+        @cached(*paths)
+        @functools.wraps(parse)
+        def loader():
+            df = snapshots.read(parse.__name__, sources)
+            return snapshots.compact(parse()) if df is None else df
+        return loader
+    return decorator
+
+
+def cache_info():
+    """Return the hit and miss counters and the number of cached entries."""
+    with _lock:
+        return CacheInfo(_stats["hits"], _stats["misses"], len(_cache))
+
+
+def cache_clear():
+    """Drop every cached table and reset the counters."""
+    with _lock:
+        _cache.clear()
+        _stats["hits"] = _stats["misses"] = 0
+
+
+# -------------------------------------------
+# Generic loaders
+# -------------------------------------------
+@cached()
+def load_csv(path):
+    """Read any CSV file unchanged."""
+    return pd.read_csv(path)
+
+
+@cached()
+def load_results(path):
+    """Read a results table with its first column as the index."""
+    df = pd.read_csv(path)
+    return df.set_index(df.columns[0])
+
+
+@cached()
+def load_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# -------------------------------------------
+# Named tables
+# -------------------------------------------
+@table("Non_age_standardised_smoking_prevalence.csv")
+def load_prevalence():
+    """Non-age-standardised WHO prevalence: point estimates and their interval bounds as floats."""
+    df = pd.read_csv(data_path("Non_age_standardised_smoking_prevalence.csv"))
+    df = df.rename(columns={
+        "Unnamed: 0": "Region",
+        "Unnamed: 1": "Year",
+        "Estimate of current tobacco use prevalence (%)": "Overall use",
+        "Estimate of current tobacco use prevalence (%).1": "Male",
+        "Estimate of current tobacco use prevalence (%).2": "Female"
+    })
+    df = df.drop(index=0)
+    df = df[["Region", "Year"] + PREVALENCE_GROUPS]
+    # "31.4 [25.1-38.0]" -> 31.4, with 25.1 and 38.0 in "Overall use Low" and "Overall use High"
+    df = estimates.frame(df, PREVALENCE_GROUPS)
+    df["Year"] = df["Year"].astype(int)
+    return df
+
+
+@table("MPOWER.csv")
+def load_mpower():
+    """Raw WHO MPOWER scores (1–5 scale) with short policy column names."""
+    emp = pd.read_csv(data_path("MPOWER.csv"))
+    emp = emp.rename(columns={
+        "Countries, territories and areas": "Region",
+        "Protect from tobacco smoke": "exposure_protect",
+        "Offer help to quit tobacco use": "cessation_support",
+        "Warn about the dangers of tobacco": "risk_warning",
+        "Enforce bans on tobacco advertising": "advertisement_ban",
+        "Raise taxes on tobacco": "tax_increase",
+        "Anti-tobacco mass media campaigns": "media_campaign"
+    })
+    for policy in MPOWER_POLICIES:
+        emp[policy] = pd.to_numeric(emp[policy], errors='coerce')
+    return emp
+
+
+@table("CleanCigarettePrice.csv")
+def load_price():
+    return pd.read_csv(data_path("CleanCigarettePrice.csv"))
+
+
+@table("CleanTobaccoControl.csv")
+def load_tobacco_control():
+    return pd.read_csv(data_path("CleanTobaccoControl.csv"))
+
+
+@table("CleanMPOWER.csv")
+def load_clean_mpower():
+    return pd.read_csv(data_path("CleanMPOWER.csv"))
+
+
+@table("CleanTobaccoUseStandardised.csv")
+def load_prevalence_standardised():
+    return pd.read_csv(data_path("CleanTobaccoUseStandardised.csv"))
+
+
+@table("CleanCountryClassification.csv")
+def load_country_classification():
+    return pd.read_csv(data_path("CleanCountryClassification.csv"), index_col=0)
+
+
+@table("merged_tobacco_data.csv")
+def load_merged():
+    """The merged modelling table, without the saved index column."""
+    merged = pd.read_csv(data_path("merged_tobacco_data.csv"))
+    return merged.drop(['Unnamed: 0'], axis=1)
+
+
+@table("interpolation_validation.csv")
+def load_interpolation_validation():
+    """Leave-one-year-out interpolation errors per table, column, method and year."""
+    return pd.read_csv(data_path("interpolation_validation.csv"))
+
+
+@table("interpolation_validation_regions.csv")
+def load_interpolation_validation_regions():
+    """Real and interpolated values behind :func:`load_interpolation_validation`, per region."""
+    return pd.read_csv(data_path("interpolation_validation_regions.csv"))
+
+
+@cached(data_path("merged_tobacco_data.csv"))
+def load_statistical_panel():
+    """The merged table as the statistical notebook used it.
+
+    Outcome and group columns are renamed to formula-safe names
+    (``Overall_use``, ``Income_Group``, ``Continental_Classification``), and
+    North and Latin America are merged into ``Americas``.
+    """
+    df = load_merged().rename(columns={"Overall use": "Overall_use", "Income Group": "Income_Group",
+                                       "Continental Classification": "Continental_Classification"})
+    df = df.drop(columns=["Objectives exist", "Ntl agency exists", "No. staff", "Monitor"])
+    df["Region"] = df["Region"].astype(str)
+    df["Income_Group"] = df["Income_Group"].astype(str)
+    df["Continental_Classification"] = df["Continental_Classification"].astype(str).replace(
+        {"North America": "Americas", "Latin America & Caribbean": "Americas"})
+    return df.reset_index(drop=True)
@@ -0,0 +1,124 @@
+"""Multicollinearity diagnostics for the policy regressors.
+
+The notebook ran ``variance_inflation_factor`` in a list comprehension,
+refitting one OLS per predictor, and computed the correlation heatmap
+separately. :func:`diagnose` derives everything from one symmetric
+eigendecomposition ``R = V diag(λ) Vᵀ`` of the scaled cross-product matrix
+of the predictors:
+
+* variance inflation factors ``diag(R⁻¹) = Σⱼ V²ₖⱼ / λⱼ``;
+* condition indices ``√(λ_max / λⱼ)``;
+* Belsley's variance-decomposition proportions, the share of each VIF that
+  falls on each dimension ``j``.
+
+With ``centered=True``, ``R`` is the correlation matrix, which gives the
+VIFs of a model with an intercept. By default the columns are only scaled
+to unit length, as ``variance_inflation_factor`` without a constant did when
+the notebook was run (Cessation Support 11.3, Risk Warnings 10.4), and as
+Belsley's diagnostics prescribe.
+
+With ``by``, the cross-products of every stratum are accumulated in one pass
+and all strata are decomposed in one batched ``eigh`` call.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tobacco.stratified import POLICIES
+
+HIGH_VIF = 10
+HIGH_CONDITION = 30
+
+
+class Diagnostics(namedtuple("Diagnostics", ["stratum", "nobs", "variables", "vif", "condition", "proportions",
+                                             "correlation"])):
+    """Collinearity diagnostics of one stratum.
+
+    ``vif`` is indexed by variable; ``condition`` holds the condition index
+    of every dimension, largest first; ``proportions`` is dimensions ×
+    variables; ``correlation`` is the Pearson correlation matrix.
+    """
+
+    __slots__ = ()
+
+    def table(self):
+        """VIF per variable, highest first."""
+        return self.vif.rename("VIF").rename_axis("Variable").reset_index().sort_values(
+            "VIF", ascending=False, ignore_index=True)
+
+    def decomposition(self):
+        """Condition indices next to the variance-decomposition proportions, as Belsley tabulates them."""
+        return pd.concat([self.condition.rename("Condition index"), self.proportions], axis=1)
+
+    def high(self, threshold=HIGH_VIF):
+        """Variables with a VIF above ``threshold``, highest first."""
+        return self.vif[self.vif > threshold].sort_values(ascending=False)
+
+
+def _cross_products(X, groups, n_groups):
+    """Per-group sums of ``X`` and ``XᵀX`` from one pass over the rows."""
+    k = X.shape[1]
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.stack([np.bincount(groups, weights=col, minlength=n_groups) for col in X.T], axis=1)
+    outer = (X[:, :, None] * X[:, None, :]).reshape(len(X), k * k)
+    products = np.stack([np.bincount(groups, weights=col, minlength=n_groups) for col in outer.T], axis=1)
+    return counts, sums, products.reshape(n_groups, k, k)
+
+
+def _scale(gram):
+    norms = np.sqrt(np.einsum("sii->si", gram))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return gram / norms[:, :, None] / norms[:, None, :]
+
+
+def diagnose(df, columns=POLICIES, by=None, centered=False):
+    """Diagnose ``columns`` of ``df``, per stratum of the column ``by`` if given.
+
+    Returns a dict of :class:`Diagnostics` keyed by stratum (``"All"`` without
+    ``by``). Strata in which a column is constant (or all zero, uncentered)
+    get NaN diagnostics.
+    """
+    columns = list(columns)
+    df = df.dropna(subset=columns)
+    if by is None:
+        groups, labels = np.zeros(len(df), dtype=np.intp), ["All"]
+    else:
+        groups, labels = pd.factorize(df[by], sort=True)
+    X = df[columns].to_numpy(dtype=float)
+    counts, sums, products = _cross_products(X, groups, len(labels))
+
+    means = sums / counts[:, None]
+    covariance = products - counts[:, None, None] * means[:, :, None] * means[:, None, :]
+    correlation = _scale(covariance)
+    scaled = correlation if centered else _scale(products)
+
+    k = len(columns)
+    valid = np.isfinite(scaled).all(axis=(1, 2))
+    eigenvalues = np.full((len(labels), k), np.nan)
+    vectors = np.full((len(labels), k, k), np.nan)
+    if valid.any():
+        eigenvalues[valid], vectors[valid] = np.linalg.eigh(scaled[valid])
+    # eigh sorts ascending; Belsley's tables list the largest dimension first
+    eigenvalues, vectors = eigenvalues[:, ::-1], vectors[:, :, ::-1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        phi = vectors ** 2 / eigenvalues[:, None, :]
+        vif = phi.sum(axis=2)
+        proportions = phi / vif[:, :, None]
+        condition = np.sqrt(eigenvalues[:, :1] / eigenvalues)
+
+    dimensions = pd.RangeIndex(1, k + 1, name="Dimension")
+    return {
+        label: Diagnostics(
+            stratum=label,
+            nobs=int(counts[s]),
+            variables=columns,
+            vif=pd.Series(vif[s], index=columns),
+            condition=pd.Series(condition[s], index=dimensions),
+            proportions=pd.DataFrame(proportions[s].T, index=dimensions, columns=columns),
+            correlation=pd.DataFrame(correlation[s], index=columns, columns=columns),
+        )
+        for s, label in enumerate(labels)
+    }
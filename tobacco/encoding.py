@@ -0,0 +1,91 @@
+"""Target encoding of integer-coded categories from running sums and counts.
+
+The notebook installed ``category_encoders`` for one
+``LeaveOneOutEncoder(cols=['Region'])``. :class:`TargetEncoder` reproduces
+it. It keeps the per-category sum and count of the target, so:
+
+* fitting, encoding and leave-one-out encoding are single ``bincount`` or
+  gather passes;
+* new country-years are folded in by :meth:`TargetEncoder.update` without
+  touching the old rows;
+* :meth:`TargetEncoder.out_of_fold` encodes every row with the statistics of
+  the other folds, all folds at once, for cross-validation.
+
+Categories are integer codes such as those of ``pd.factorize``. Unseen
+categories, and in leave-one-out the only row of a category, get the global
+mean of the target, as ``category_encoders`` does.
+"""
+
+import numpy as np
+
+
+class TargetEncoder:
+    """Per-category running sums and counts of a target."""
+
+    def __init__(self):
+        self.sums = np.zeros(0)
+        self.counts = np.zeros(0)
+
+    @property
+    def global_mean(self):
+        return self.sums.sum() / self.counts.sum()
+
+    def fit(self, codes, y):
+        """Reset the statistics to those of ``y`` grouped by ``codes``."""
+        self.sums = np.zeros(0)
+        self.counts = np.zeros(0)
+        return self.update(codes, y)
+
+    def update(self, codes, y):
+        """Add rows, growing the tables when new categories appear."""
+        codes = np.asarray(codes, dtype=np.intp)
+        size = max(len(self.sums), int(codes.max()) + 1 if len(codes) else 0)
+        sums = np.bincount(codes, weights=np.asarray(y, dtype=float), minlength=size)
+        counts = np.bincount(codes, minlength=size).astype(float)
+        sums[:len(self.sums)] += self.sums
+        counts[:len(self.counts)] += self.counts
+        self.sums, self.counts = sums, counts
+        return self
+
+    def _gather(self, codes):
+        codes = np.asarray(codes, dtype=np.intp)
+        seen = codes < len(self.sums)
+        sums = np.where(seen, self.sums[np.where(seen, codes, 0)], 0.0)
+        counts = np.where(seen, self.counts[np.where(seen, codes, 0)], 0.0)
+        return sums, counts
+
+    def transform(self, codes):
+        """The mean target of every row's category."""
+        sums, counts = self._gather(codes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, self.global_mean)
+
+    def leave_one_out(self, codes, y):
+        """The mean target of every row's category without the row itself.
+
+        ``codes`` and ``y`` must be rows the encoder was fitted on.
+        """
+        sums, counts = self._gather(codes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 1, (sums - y) / (counts - 1), self.global_mean)
+
+    def out_of_fold(self, codes, y, folds):
+        """Encode every row with the category means of the rows in the other folds.
+
+        ``folds`` holds the fold number of every row. Categories missing from
+        the other folds, as all of them are under grouped folds, get the
+        other folds' global mean.
+        """
+        codes = np.asarray(codes, dtype=np.intp)
+        folds = np.asarray(folds, dtype=np.intp)
+        y = np.asarray(y, dtype=float)
+        n_codes, n_folds = int(codes.max()) + 1, int(folds.max()) + 1
+        cells = folds * n_codes + codes
+        fold_sums = np.bincount(cells, weights=y, minlength=n_folds * n_codes).reshape(n_folds, n_codes)
+        fold_counts = np.bincount(cells, minlength=n_folds * n_codes).reshape(n_folds, n_codes)
+        sums = fold_sums.sum(axis=0)[codes] - fold_sums[folds, codes]
+        counts = fold_counts.sum(axis=0)[codes] - fold_counts[folds, codes]
+        other_sums = y.sum() - fold_sums.sum(axis=1)[folds]
+        other_counts = len(y) - fold_counts.sum(axis=1)[folds]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, other_sums / other_counts)
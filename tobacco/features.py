@@ -0,0 +1,80 @@
+"""Lag, lead, rolling-mean and difference features over the region × year panel.
+
+The notebook's Time Lag experiment called ``groupby('Region')[var].shift(1)``
+once per policy. That assumes the rows are sorted and exactly one survey
+round (two years) apart. :class:`PanelFeatures` aligns a long
+``Region``/``Year`` table once into a dense ``(region, year, feature)``
+array with :func:`tobacco.interpolation.align`. Every transformation then
+works on all features at once along the year axis. Offsets and windows are
+in calendar years, not rows:
+
+* a lag or lead whose year is not on the grid, or is missing there, is NaN;
+* a rolling mean averages the observed values within its window.
+
+:meth:`PanelFeatures.frame` writes all requested features into one
+preallocated array and returns a DataFrame view of it, indexed by
+``(Region, Year)``. Column names follow the notebook: ``{var}_t-2`` is the
+two-year lag, ``{var}_t+2`` the two-year lead, ``{var}_mean4`` the four-year
+rolling mean and ``{var}_diff2`` the two-year difference.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tobacco import interpolation
+
+
+class PanelFeatures:
+    """A dense ``values[region, year, feature]`` array with year-aware shifts."""
+
+    def __init__(self, df, columns):
+        self.columns = list(columns)
+        panel = interpolation.align([df[["Region", "Year"] + self.columns]])
+        self.regions, self.years, self.values = panel.regions, panel.years, panel.values
+
+    def _shifted(self, offset):
+        """``values`` at ``year - offset`` for every year, NaN where that year is off the grid."""
+        target = self.years - offset
+        position = np.clip(np.searchsorted(self.years, target), 0, len(self.years) - 1)
+        on_grid = self.years[position] == target
+        shifted = self.values[:, position, :]
+        shifted[:, ~on_grid, :] = np.nan
+        return shifted
+
+    def lag(self, years):
+        return self._shifted(years)
+
+    def lead(self, years):
+        return self._shifted(-years)
+
+    def diff(self, years):
+        return self.values - self._shifted(years)
+
+    def rolling_mean(self, years):
+        """Mean of the observed values in the ``years`` up to and including each year."""
+        observed = ~np.isnan(self.values)
+        zeros = np.zeros((len(self.regions), 1, len(self.columns)))
+        sums = np.concatenate([zeros, np.cumsum(np.where(observed, self.values, 0.0), axis=1)], axis=1)
+        counts = np.concatenate([zeros, np.cumsum(observed, axis=1)], axis=1)
+        start = np.searchsorted(self.years, self.years - years, side="right")
+        end = np.arange(1, len(self.years) + 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (sums[:, end] - sums[:, start]) / (counts[:, end] - counts[:, start])
+
+    def frame(self, lags=(), leads=(), rolling=(), diffs=(), base=False):
+        """All requested features as a ``(Region, Year)``-indexed view of one array.
+
+        ``base=True`` also includes the untransformed columns first.
+        """
+        blocks = ([("", None)] if base else []) + [(f"_t-{k}", (self.lag, k)) for k in lags] \
+            + [(f"_t+{k}", (self.lead, k)) for k in leads] \
+            + [(f"_mean{k}", (self.rolling_mean, k)) for k in rolling] \
+            + [(f"_diff{k}", (self.diff, k)) for k in diffs]
+        n_features = len(self.columns)
+        out = np.empty((len(self.regions), len(self.years), n_features * len(blocks)))
+        names = []
+        for b, (suffix, op) in enumerate(blocks):
+            out[:, :, b * n_features:(b + 1) * n_features] = self.values if op is None else op[0](op[1])
+            names += [f"{col}{suffix}" for col in self.columns]
+        index = pd.MultiIndex.from_product([self.regions, self.years], names=["Region", "Year"])
+        return pd.DataFrame(out.reshape(-1, out.shape[2]), index=index, columns=names, copy=False)
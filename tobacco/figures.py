@@ -0,0 +1,143 @@
+"""Pre-rendered, cached matplotlib/seaborn charts.
+
+The Exploratory Analysis page drew its histogram, box plot and MPOWER bar
+chart on new ``pyplot`` figures on every rerun and never closed them, so a
+long-lived server kept every figure it had ever drawn. Charts are now
+functions decorated with :func:`figure`:
+
+* the first call for a chart spec (the arguments, output format and the
+  version of the data files it reads) draws on a standalone Agg
+  :class:`~matplotlib.figure.Figure` and saves it to PNG or SVG bytes;
+* the figure is cleared and dropped in a ``finally`` block, and because
+  ``pyplot`` is never involved, no global figure registry keeps it alive;
+* later calls return the cached bytes.
+
+The bytes live in one :class:`FigureCache`. It evicts the least recently
+used entries once their total size exceeds its budget, so memory stays
+bounded however many users and selections a server sees.
+"""
+
+import functools
+import io
+import threading
+from collections import OrderedDict, namedtuple
+
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from tobacco import data, panels
+
+BUDGET = 64 * 1024 * 1024
+FORMATS = ("png", "svg")
+DPI = 200
+
+PREVALENCE_COLORS = {"Overall use": "#4169E1", "Male": "#2ECC71", "Female": "#9B59B6"}
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "entries", "bytes"])
+
+
+class FigureCache:
+    """Rendered figures keyed on their spec, evicted least recently used beyond ``budget`` bytes."""
+
+    def __init__(self, budget=BUDGET):
+        self.budget = budget
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key, render):
+        """The bytes cached under ``key``, rendering them with ``render()`` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+            self._stats["misses"] += 1
+        # matplotlib's text and font caches are shared, so one figure renders at a time
+        with self._render_lock:
+            rendered = render()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = rendered
+                self._size += len(rendered)
+            while self._size > self.budget and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return rendered
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._stats["hits"], self._stats["misses"], len(self._entries), self._size)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+CACHE = FigureCache()
+
+
+def render(draw, figsize, fmt="png"):
+    """Draw on a fresh standalone figure with ``draw(fig, ax)`` and return the saved bytes."""
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}, got {fmt!r}")
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    try:
+        draw(fig, fig.add_subplot())
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=DPI, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def figure(*files, figsize=(6, 4)):
+    """Turn ``draw(fig, ax, *args)`` into a cached ``chart(*args, fmt="png")`` returning image bytes.
+
+    ``files`` are the data files the chart reads; rewriting any of them
+    changes the key. Arguments must be hashable, e.g. tuples of countries.
+    """
+    def decorator(draw):
+        @functools.wraps(draw)
+        def chart(*args, fmt="png"):
+            key = (draw.__qualname__, args, fmt, data.version(*files))
+            return CACHE.get(key, lambda: render(lambda fig, ax: draw(fig, ax, *args), figsize, fmt))
+        return chart
+    return decorator
+
+
+# -------------------------------------------
+# Exploratory Analysis charts
+# -------------------------------------------
+@figure("Non_age_standardised_smoking_prevalence.csv", figsize=(6, 4))
+def prevalence_histogram(fig, ax, group):
+    """Distribution of ``group`` prevalence over all countries and years, with a KDE."""
+    sns.histplot(data.load_prevalence()[group], kde=True, color=PREVALENCE_COLORS[group], ax=ax)
+    ax.set_xlabel("Tobacco Use Prevalence (%)")
+    ax.set_ylabel("Frequency")
+
+
+@figure("Non_age_standardised_smoking_prevalence.csv", figsize=(7, 4))
+def prevalence_boxplot(fig, ax, group):
+    """``group`` prevalence per year as box plots."""
+    sns.boxplot(x="Year", y=group, data=data.load_prevalence(), color=PREVALENCE_COLORS[group], ax=ax)
+    ax.set_ylabel("Tobacco Use Prevalence (%)")
+    ax.set_xlabel("Year")
+    ax.tick_params(axis='x', rotation=45)
+
+
+@figure("MPOWER.csv", figsize=(10, 6))
+def mpower_scores(fig, ax, countries, year):
+    """MPOWER implementation scores of ``countries`` (a tuple, in legend order) in ``year``."""
+    filtered = panels.load_store().frame("mpower", countries, years=[year])
+    melted = filtered.melt(id_vars=["Region"], value_vars=data.MPOWER_POLICIES, var_name="Policy", value_name="Score")
+    sns.barplot(data=melted, x="Score", y="Policy", hue="Region", hue_order=list(countries), ax=ax, palette="muted")
+    ax.set_xlabel("Implementation Score (0–5)")
+    ax.set_ylabel("MPOWER Policy")
+    if countries:
+        ax.legend(title="Country", bbox_to_anchor=(1.05, 1), loc="upper left")
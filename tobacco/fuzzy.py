@@ -0,0 +1,101 @@
+"""FuzzyWuzzy-compatible string scoring on top of :mod:`difflib`.
+
+The cleaning notebook matched country names with ``fuzzywuzzy.process.extractOne``
+and its default ``WRatio`` scorer. Without python-Levenshtein installed,
+FuzzyWuzzy itself runs on ``difflib.SequenceMatcher``; this module ports that
+code path so the pipeline reproduces the notebook's matches without the extra
+dependency.
+"""
+
+import re
+from difflib import SequenceMatcher
+
+_NON_WORD = re.compile(r"(?ui)\W")
+_NON_ASCII = {i: None for i in range(128, 256)}
+
+
+def full_process(s, force_ascii=True):
+    """Lower-case ``s``, replace non-alphanumerics by spaces and strip it."""
+    if force_ascii:
+        s = s.translate(_NON_ASCII)
+    return _NON_WORD.sub(" ", s).lower().strip()
+
+
+def _intr(x):
+    return int(round(x))
+
+
+def ratio(s1, s2):
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    return _intr(100 * SequenceMatcher(None, s1, s2).ratio())
+
+
+def partial_ratio(s1, s2):
+    """Best :func:`ratio` of the shorter string against windows of the longer one."""
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    shorter, longer = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
+    scores = []
+    for i, j, _ in SequenceMatcher(None, shorter, longer).get_matching_blocks():
+        start = max(j - i, 0)
+        r = SequenceMatcher(None, shorter, longer[start:start + len(shorter)]).ratio()
+        if r > .995:
+            return 100
+        scores.append(r)
+    return _intr(100 * max(scores))
+
+
+def _token_sort(s1, s2, partial):
+    sorted1 = " ".join(sorted(s1.split())).strip()
+    sorted2 = " ".join(sorted(s2.split())).strip()
+    return partial_ratio(sorted1, sorted2) if partial else ratio(sorted1, sorted2)
+
+
+def _token_set(s1, s2, partial):
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    tokens1, tokens2 = set(s1.split()), set(s2.split())
+    sect = " ".join(sorted(tokens1 & tokens2))
+    combined_1to2 = (sect + " " + " ".join(sorted(tokens1 - tokens2))).strip()
+    combined_2to1 = (sect + " " + " ".join(sorted(tokens2 - tokens1))).strip()
+    sect = sect.strip()
+    ratio_func = partial_ratio if partial else ratio
+    return max(ratio_func(sect, combined_1to2),
+               ratio_func(sect, combined_2to1),
+               ratio_func(combined_1to2, combined_2to1))
+
+
+def wratio(s1, s2):
+    """FuzzyWuzzy's ``WRatio`` for two strings already passed through :func:`full_process`."""
+    if not s1 or not s2:
+        return 0
+    base = ratio(s1, s2)
+    len_ratio = max(len(s1), len(s2)) / min(len(s1), len(s2))
+    unbase_scale = .95
+    partial_scale = .6 if len_ratio > 8 else .90
+    if len_ratio < 1.5:
+        return _intr(max(base,
+                         _token_sort(s1, s2, False) * unbase_scale,
+                         _token_set(s1, s2, False) * unbase_scale))
+    return _intr(max(base,
+                     partial_ratio(s1, s2) * partial_scale,
+                     _token_sort(s1, s2, True) * unbase_scale * partial_scale,
+                     _token_set(s1, s2, True) * unbase_scale * partial_scale))
+
+
+def extract_one(query, choices):
+    """Return ``(choice, score)`` for the best-scoring choice, first one on ties."""
+    processed = full_process(query)
+    best, best_score = None, -1
+    for choice in choices:
+        score = wratio(processed, full_process(choice))
+        if score > best_score:
+            best, best_score = choice, score
+    return best, best_score
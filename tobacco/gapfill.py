@@ -0,0 +1,102 @@
+"""Vectorized filling of 0 ("no data") MPOWER scores from neighbouring survey years.
+
+Replaces the notebook's ``replace_zero_with_scale`` loop, which walked every
+country row by row for one policy column at a time. :func:`fill_zero_scores`
+handles any number of columns in one pass over the whole table.
+
+Strategies:
+
+``"linear"``
+    The notebook's rule and the default. A zero in an interior row of its
+    country (not the first or last row, in table order) becomes the rounded
+    mean of the scores two years before and after; 2008 uses 2007 and 2010
+    and 2022 copies 2020. Both neighbours must be non-zero. Rounding is half
+    to even, like Python's ``round``.
+``"previous"``
+    Carry the last non-zero score of an earlier year forward.
+``"nearest"``
+    Take the non-zero score closest in time, preferring the earlier year on
+    ties.
+"""
+
+import numpy as np
+import pandas as pd
+
+STRATEGIES = ("linear", "previous", "nearest")
+
+
+def _neighbour_values(df, columns, group, years):
+    """Scores of the same group in the given years, NaN where that row is missing."""
+    lookup = df.set_index([group, "Year"])[columns]
+    keys = pd.MultiIndex.from_arrays([df[group].to_numpy(), years])
+    return lookup.reindex(keys).to_numpy(dtype=float)
+
+
+def _fill_linear(df, columns, group):
+    year = df["Year"].to_numpy()
+    prev_year = np.where(year == 2008, 2007, year - 2)
+    next_year = np.where(year == 2008, 2010, year + 2)
+    prev = _neighbour_values(df, columns, group, prev_year)
+    nxt = _neighbour_values(df, columns, group, next_year)
+
+    grouped = df.groupby(group, sort=False)
+    position = grouped.cumcount().to_numpy()
+    size = grouped[group].transform("size").to_numpy()
+    interior = ((position > 0) & (position < size - 1))[:, None]
+    last_year = (year == 2022)[:, None]
+
+    # NaN comparisons are False, so a missing neighbour never fills
+    ok = (prev > 0) & ((nxt > 0) | last_year)
+    filled = np.where(last_year, prev, np.round((prev + nxt) / 2))
+    return interior & ok, filled
+
+
+def _fill_directional(df, columns, group, strategy):
+    order = np.lexsort((df["Year"].to_numpy(), df[group].to_numpy()))
+    ordered = df.iloc[order]
+    values = ordered[columns].to_numpy(dtype=float)
+    masked = pd.DataFrame(np.where(values == 0, np.nan, values), columns=columns)
+    years = pd.DataFrame(np.where(np.isnan(masked.to_numpy()), np.nan, ordered["Year"].to_numpy()[:, None]),
+                         columns=columns)
+    keys = ordered[group].to_numpy()
+
+    prev = masked.groupby(keys).ffill().to_numpy()
+    if strategy == "previous":
+        filled = prev
+    else:
+        nxt = masked.groupby(keys).bfill().to_numpy()
+        year = ordered["Year"].to_numpy()[:, None]
+        prev_gap = year - years.groupby(keys).ffill().to_numpy()
+        next_gap = years.groupby(keys).bfill().to_numpy() - year
+        use_next = np.isnan(prev) | (next_gap < prev_gap)
+        filled = np.where(use_next, nxt, prev)
+
+    # Back to the caller's row order
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    filled = filled[inverse]
+    return ~np.isnan(filled), filled
+
+
+def fill_zero_scores(df, columns, strategy="linear", group="Region"):
+    """Return a copy of ``df`` with zero scores in ``columns`` filled per ``strategy``.
+
+    Column dtypes are preserved and rows keep their order.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+    columns = list(columns)
+    if strategy == "linear":
+        ok, filled = _fill_linear(df, columns, group)
+    else:
+        ok, filled = _fill_directional(df, columns, group, strategy)
+
+    values = df[columns].to_numpy()
+    replace = (values == 0) & ok
+    out = df.copy()
+    for j, col in enumerate(columns):
+        if replace[:, j].any():
+            column = values[:, j].copy()
+            column[replace[:, j]] = filled[replace[:, j], j].astype(column.dtype)
+            out[col] = column
+    return out
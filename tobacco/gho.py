@@ -0,0 +1,246 @@
+"""Streaming ingest of WHO Global Health Observatory (GHO) long-format extracts.
+
+Run it with::
+
+    python -m tobacco.gho EXTRACT [--indicator NAME=CODE[:DIM2] ...] [--chunksize 50000] [--out panel.csv]
+
+A GHO extract has one fact per row and about 34 columns per fact, with the
+``Dim1``/``Dim2``/``Dim3`` breakdowns spelled out. ``tobaccoprice.csv``
+holds four prices per country and year, of which the pipeline keeps one:
+the price in international dollars. The production feed delivers the same
+layout at many times the size, so :func:`ingest` never loads a whole
+extract:
+
+1. Records are read as raw text, ``chunksize`` kept records at a time. A
+   quoted field may span lines; a record ends at a line break outside
+   quotes.
+2. A record is only parsed if its text contains the ``IndicatorCode`` and
+   ``Dim2ValueCode`` of a requested :class:`Indicator`. For a narrow request,
+   most of the extract is dropped by this substring test.
+3. The kept records are parsed into the :data:`FIELDS` alone, with typed
+   converters, and matched exactly against the requested codes.
+4. Each match becomes one ``(Region, Year, indicator)`` cell of the result.
+
+Memory is bounded by one chunk plus the cells of the result, whatever the
+size of the extract.
+
+JSON extracts are read the same way, in one of three forms:
+
+* JSON Lines, pre-filtered on the raw line;
+* a top-level array of records;
+* the GHO OData API's ``{"value": [...]}`` document, decoded one record at a
+  time.
+
+OData records name their fields ``SpatialDim``, ``TimeDim``, ``Dim2`` and so
+on, and carry codes rather than location names. Their regions are therefore
+ISO3 codes. So is the region of any other record with an empty ``Location``.
+"""
+
+import argparse
+import gzip
+import io
+import json
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tobacco import interpolation
+
+CHUNKSIZE = 50_000
+BLOCK = 1 << 20
+JSON_LINES = (".jsonl", ".ndjson", ".jsonl.gz", ".ndjson.gz")
+
+FIELDS = ["IndicatorCode", "Dim2ValueCode", "SpatialDimValueCode", "Location", "Period", "Value"]
+CELLS = ["Region", "Year", "Indicator", "Value"]
+
+# GHO OData field -> extract column
+ODATA_FIELDS = {"IndicatorCode": "IndicatorCode", "Dim2": "Dim2ValueCode", "SpatialDim": "SpatialDimValueCode",
+                "TimeDim": "Period", "Value": "Value"}
+
+Indicator = namedtuple("Indicator", ["code", "dim2"])
+Indicator.__new__.__defaults__ = (None,)
+Indicator.__doc__ = """A GHO indicator code, optionally restricted to one ``Dim2ValueCode``."""
+
+# The retail price of the most sold cigarette brand in international dollars (PPP)
+PRICE = {"Cigarette_price": Indicator("TOB_R_PRICE", "PRICE_PRICE_IN_PPP")}
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def _wanted(text, indicators):
+    """Whether raw ``text`` can hold a record of one of ``indicators`` (a superset test)."""
+    return any(i.code in text and (i.dim2 is None or i.dim2 in text) for i in indicators)
+
+
+def _matches(df, indicators):
+    """The name of the indicator of every row of ``df``, ``None`` where none matches exactly."""
+    names = np.full(len(df), None, dtype=object)
+    for name, i in indicators.items():
+        hit = df["IndicatorCode"].to_numpy() == i.code
+        if i.dim2 is not None:
+            hit &= df["Dim2ValueCode"].to_numpy() == i.dim2
+        names[hit & (names == None)] = name  # noqa: E711
+    return names
+
+
+def _typed(df, indicators):
+    """Keep the rows of ``indicators`` as ``Region``, ``Year``, ``Indicator``, ``Value`` columns."""
+    names = _matches(df, indicators)
+    keep = names != None  # noqa: E711
+    df = df[keep]
+    # Per row: a record without a location name falls back to its ISO3 code
+    region = df["Location"].fillna(df["SpatialDimValueCode"]) if "Location" in df else df["SpatialDimValueCode"]
+    return pd.DataFrame({
+        "Region": region.astype(str).to_numpy(),
+        "Year": df["Period"].astype(np.int32).to_numpy(),
+        "Indicator": names[keep],
+        # Values such as "5 494 505" are not numbers in the extract either
+        "Value": pd.to_numeric(df["Value"], errors="coerce").to_numpy(dtype=float),
+    })
+
+
+# -------------------------------------------
+# Readers
+# -------------------------------------------
+def csv_chunks(path, indicators, chunksize=CHUNKSIZE):
+    """Typed frames of the records of ``indicators`` in a GHO CSV extract, ``chunksize`` records at a time."""
+    wanted = list(indicators.values())
+    with _open(path) as f:
+        header = f.readline()
+        usecols = [c for c in FIELDS if c in pd.read_csv(io.StringIO(header), nrows=0).columns]
+        dtype = {c: str for c in usecols if c != "Period"}
+
+        def parse(records):
+            df = pd.read_csv(io.StringIO(header + "".join(records)), usecols=usecols, dtype=dtype)
+            return _typed(df, indicators)
+
+        records, pending = [], []
+        for line in f:
+            pending.append(line)
+            # An odd number of quotes so far means a quoted field runs on to the next line
+            if sum(part.count('"') for part in pending) % 2:
+                continue
+            record = "".join(pending)
+            pending = []
+            if _wanted(record, wanted):
+                records.append(record)
+                if len(records) >= chunksize:
+                    yield parse(records)
+                    records = []
+        if records:
+            yield parse(records)
+
+
+def _json_values(f):
+    """Decode the records of a JSON array, or of the ``value`` array of an OData document, one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(BLOCK)
+    # The records start at the top-level "[", or at the one after the "value" key
+    key = 0 if buffer.lstrip().startswith("[") else buffer.find('"value"')
+    while key < 0 or buffer.find("[", key) < 0:
+        more = f.read(BLOCK)
+        if not more:
+            raise ValueError("no record array in the JSON document")
+        buffer += more
+        key = 0 if key == 0 else buffer.find('"value"')
+    pos = buffer.find("[", key) + 1
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            more = f.read(BLOCK)
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield record
+        pos = end
+        if pos > BLOCK:
+            buffer, pos = buffer[pos:], 0
+
+
+def json_chunks(path, indicators, chunksize=CHUNKSIZE):
+    """Like :func:`csv_chunks` for JSON Lines, JSON array and GHO OData extracts."""
+    wanted = list(indicators.values())
+    with _open(path) as f:
+        if path.endswith(JSON_LINES):
+            records = (json.loads(line) for line in f if _wanted(line, wanted))
+        else:
+            records = _json_values(f)
+
+        rows = []
+        for record in records:
+            if "SpatialDim" in record:
+                record = {column: record.get(field) for field, column in ODATA_FIELDS.items()}
+            if _wanted(f"{record.get('IndicatorCode')} {record.get('Dim2ValueCode')}", wanted):
+                rows.append([record.get(c) for c in FIELDS])
+                if len(rows) >= chunksize:
+                    yield _typed(pd.DataFrame(rows, columns=FIELDS), indicators)
+                    rows = []
+        if rows:
+            yield _typed(pd.DataFrame(rows, columns=FIELDS), indicators)
+
+
+def chunks(path, indicators, chunksize=CHUNKSIZE):
+    """Read ``path`` with :func:`json_chunks` or :func:`csv_chunks` depending on its extension."""
+    reader = json_chunks if path.endswith((".json", ".json.gz") + JSON_LINES) else csv_chunks
+    return reader(path, indicators, chunksize)
+
+
+# -------------------------------------------
+# Panels
+# -------------------------------------------
+def ingest(path, indicators=PRICE, chunksize=CHUNKSIZE):
+    """One row per ``Region``/``Year`` and one column per indicator, in the order of the extract.
+
+    A cell reported more than once keeps its first value.
+    """
+    cells = pd.concat(list(chunks(path, indicators, chunksize)) or [pd.DataFrame(columns=CELLS)], ignore_index=True)
+    cells = cells.drop_duplicates(["Region", "Year", "Indicator"])
+    rows, keys = pd.MultiIndex.from_arrays([cells["Region"], cells["Year"]]).factorize()
+    columns = pd.Index(list(indicators)).get_indexer(cells["Indicator"])
+    values = np.full((len(keys), len(indicators)), np.nan)
+    values[rows, columns] = cells["Value"].to_numpy(dtype=float)
+    wide = pd.DataFrame(values, columns=list(indicators))
+    wide.insert(0, "Year", keys.get_level_values(1).to_numpy(dtype=np.int32))
+    wide.insert(0, "Region", keys.get_level_values(0).to_numpy(dtype=object))
+    return wide
+
+
+def panel(path, indicators=PRICE, chunksize=CHUNKSIZE):
+    """:func:`ingest` as a dense ``(region, year, indicator)`` :class:`~tobacco.interpolation.Panel`."""
+    return interpolation.align([ingest(path, indicators, chunksize)])
+
+
+def parse_indicator(spec):
+    """``NAME=CODE[:DIM2]`` -> ``(NAME, Indicator)``."""
+    name, _, codes = spec.partition("=")
+    code, _, dim2 = codes.partition(":")
+    if not name or not code:
+        raise argparse.ArgumentTypeError(f"expected NAME=CODE[:DIM2], got {spec!r}")
+    return name, Indicator(code, dim2 or None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a WHO GHO extract into a region × year panel")
+    parser.add_argument("extract", help="GHO CSV or JSON extract, optionally gzipped")
+    parser.add_argument("--indicator", type=parse_indicator, action="append",
+                        help="NAME=CODE[:DIM2]; defaults to the PPP cigarette price")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="records parsed at a time")
+    parser.add_argument("--out", default=None, help="write the panel as CSV instead of printing a summary")
+    args = parser.parse_args()
+    result = ingest(args.extract, dict(args.indicator) if args.indicator else PRICE, args.chunksize)
+    if args.out:
+        result.to_csv(args.out, index=False)
+    else:
+        print(f"{result['Region'].nunique()} regions, {result['Year'].nunique()} years, {len(result)} rows")
+        print(result.head().to_string(index=False))
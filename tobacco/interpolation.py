@@ -0,0 +1,143 @@
+"""Batch interpolation of the prevalence and price series onto one year grid.
+
+The WHO prevalence estimates (2000, 2005, 2007, 2010, 2015, 2020–2022, ...)
+and the MPOWER/price tables (every two years from 2008) use different survey
+years. :func:`align` outer-joins any number of long ``Region``/``Year`` tables
+and reindexes them once onto the full region × year grid. The result is a
+:class:`Panel` that holds a dense ``(region, year, column)`` array.
+:func:`interpolate` then fills every series at once with NumPy. Each cell
+gets a provenance flag:
+
+``REAL``
+    observed in the source table
+``INTERPOLATED``
+    between two observations of the same region
+``EXTRAPOLATED``
+    copied from the nearest observation at the start or end of a series
+``MISSING``
+    still empty
+
+``method="linear"`` spaces the years equally, like ``Series.interpolate()``
+in the notebooks. ``method="index"`` weights by the actual year gaps.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+REAL, INTERPOLATED, EXTRAPOLATED, MISSING = 0, 1, 2, 3
+FLAG_NAMES = {REAL: "real", INTERPOLATED: "interpolated", EXTRAPOLATED: "extrapolated", MISSING: "missing"}
+
+STANDARDISED_COLUMNS = ["Overall use", "Male", "Female"]
+
+
+class Panel(namedtuple("Panel", ["regions", "years", "columns", "values", "flags"])):
+    """Dense ``values[region, year, column]`` array with matching ``flags``."""
+
+    __slots__ = ()
+
+    def _index(self):
+        return pd.MultiIndex.from_product([self.regions, self.years], names=["Region", "Year"])
+
+    def frame(self):
+        """The values as a long ``Region``/``Year`` DataFrame."""
+        n = len(self.regions) * len(self.years)
+        values = pd.DataFrame(self.values.reshape(n, -1), index=self._index(), columns=self.columns)
+        return values.reset_index()
+
+    def flag_frame(self):
+        """The provenance flags as a long DataFrame of ``FLAG_NAMES`` labels."""
+        n = len(self.regions) * len(self.years)
+        labels = np.array([FLAG_NAMES[k] for k in sorted(FLAG_NAMES)])
+        flags = pd.DataFrame(labels[self.flags.reshape(n, -1)], index=self._index(), columns=self.columns)
+        return flags.reset_index()
+
+
+def align(tables, years=None):
+    """Align long ``Region``/``Year`` tables on the full grid of their regions and years.
+
+    ``years`` restricts or extends the grid; by default it is every year seen
+    in any table. Observed cells are flagged ``REAL`` and the rest ``MISSING``.
+    """
+    indexed = [t.set_index(["Region", "Year"]) for t in tables]
+    joined = pd.concat(indexed, axis=1, join="outer")
+    keys = joined.index
+    regions = np.sort(keys.get_level_values("Region").unique().to_numpy(dtype=object))
+    if years is None:
+        years = keys.get_level_values("Year").unique()
+    years = np.sort(np.asarray(years, dtype=int))
+
+    grid = pd.MultiIndex.from_product([regions, years], names=["Region", "Year"])
+    values = joined.reindex(grid).to_numpy(dtype=float).reshape(len(regions), len(years), -1)
+    flags = np.where(np.isnan(values), MISSING, REAL).astype(np.uint8)
+    return Panel(regions, years, list(joined.columns), values, flags)
+
+
+def interpolate(panel, method="linear", limit_direction="both"):
+    """Fill the gaps of every series in ``panel`` along the year axis.
+
+    Like pandas, ``limit_direction="forward"`` also copies the last
+    observation to the end of a series, and ``"both"`` additionally copies
+    the first observation back to the start.
+    """
+    if method not in ("linear", "index"):
+        raise ValueError(f"method must be 'linear' or 'index', got {method!r}")
+    values, flags = panel.values, panel.flags
+    x = np.arange(len(panel.years), dtype=float) if method == "linear" else panel.years.astype(float)
+
+    observed = flags == REAL
+    position = np.arange(len(panel.years))[None, :, None]
+    prev = np.maximum.accumulate(np.where(observed, position, -1), axis=1)
+    nxt = np.minimum.accumulate(np.where(observed, position, len(x))[:, ::-1], axis=1)[:, ::-1]
+    has_prev, has_next = prev >= 0, nxt < len(x)
+    prev, nxt = np.clip(prev, 0, len(x) - 1), np.clip(nxt, 0, len(x) - 1)
+
+    v_prev = np.take_along_axis(values, prev, axis=1)
+    v_next = np.take_along_axis(values, nxt, axis=1)
+    x_prev, x_next = x[prev], x[nxt]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        between = v_prev + (v_next - v_prev) * (x[None, :, None] - x_prev) / (x_next - x_prev)
+
+    inner = ~observed & has_prev & has_next
+    tail = ~observed & has_prev & ~has_next
+    head = ~observed & ~has_prev & has_next
+    if limit_direction == "forward":
+        head = np.zeros_like(head)
+    elif limit_direction != "both":
+        raise ValueError(f"limit_direction must be 'forward' or 'both', got {limit_direction!r}")
+
+    filled = values.copy()
+    filled[inner] = between[inner]
+    filled[tail] = v_prev[tail]
+    filled[head] = v_next[head]
+    new_flags = flags.copy()
+    new_flags[inner] = INTERPOLATED
+    new_flags[tail | head] = EXTRAPOLATED
+    return panel._replace(values=filled, flags=new_flags)
+
+
+def holdout(panel, year, method="linear"):
+    """Hide ``year``, interpolate it back and compare with the real values.
+
+    Returns one row per region with the real value, the interpolated value
+    and the absolute difference for every column.
+    """
+    j = int(np.searchsorted(panel.years, year))
+    if j == len(panel.years) or panel.years[j] != year:
+        raise ValueError(f"{year} is not a year of the panel")
+    hidden = panel.flags.copy()
+    hidden[:, j] = MISSING
+    values = panel.values.copy()
+    values[:, j] = np.nan
+    predicted = interpolate(panel._replace(values=values, flags=hidden), method)
+
+    real = panel.values[:, j]
+    guess = predicted.values[:, j]
+    out = pd.DataFrame({"Region": panel.regions, "Year": year})
+    for k, col in enumerate(panel.columns):
+        out[col] = real[:, k]
+        out[f"{col} ({year} interpolated)"] = guess[:, k]
+        out[f"{col} difference"] = np.abs(real[:, k] - guess[:, k])
+    return out
+
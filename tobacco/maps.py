@@ -0,0 +1,185 @@
+"""Cached plotly choropleths keyed on ISO3 codes.
+
+The Exploratory Analysis page built its animated prevalence map with
+``px.choropleth(locationmode="country names", animation_frame="Year")`` on
+every rerun. Plotly Express repeats every country name in every year's
+frame, and the browser geocodes all of those names again. The Conclusion
+page rebuilt its policy-effect map the same way. The builders here:
+
+* resolve every region name to its ISO3 code once, against the WHO
+  locations in ``tobaccoprice.csv``, with
+  :class:`tobacco.countries.CountryResolver`;
+* put the locations, names and colour scale in a single base trace, so an
+  animation frame only carries that year's ``z`` values;
+* keep one figure per dataset version.
+
+``st.plotly_chart`` still serialises the figure on every rerun. The cache
+saves the pivot, the name resolution and the figure construction.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from tobacco import countries, data
+
+LOCATIONS_FILE = "tobaccoprice.csv"
+
+PREVALENCE_YEARS = (2007, 2022)
+PREVALENCE_LABEL = "Smoking Prevalence (%)"
+
+EFFECT_COLORS = {
+    "↑↓": "green",
+    "↑↑": "red",
+    "↓↓": "orange",
+    "↓↑": "purple",
+    "==": "gray",
+    "↑=": "lightgreen",
+    "↓=": "pink",
+    "=↓": "yellow",
+    "=↑": "lightblue",
+}
+
+POLICY_COLUMNS = ["Monitor", "exposure_protect", "cessation_support", "risk_warning",
+                  "advertisement_ban", "tax_increase", "media_campaign"]
+
+
+# -------------------------------------------
+# ISO3 codes
+# -------------------------------------------
+@data.cached(data.data_path(LOCATIONS_FILE))
+def iso3_codes():
+    """``{WHO location name: ISO3 code}`` for every country in the WHO price table."""
+    df = data.load_csv(data.data_path(LOCATIONS_FILE))
+    countries_only = df[df["Location type"] == "Country"]
+    return dict(zip(countries_only["Location"], countries_only["SpatialDimValueCode"]))
+
+
+@data.cached(data.data_path(LOCATIONS_FILE))
+def _resolver():
+    return countries.CountryResolver(iso3_codes())
+
+
+def resolve(names):
+    """ISO3 codes of ``names`` as an object array, ``None`` where a name does not resolve."""
+    codes = iso3_codes()
+    resolver = _resolver()
+    return np.array([codes.get(resolver.resolve(name)) for name in names], dtype=object)
+
+
+def _located(regions):
+    """Positions and ISO3 codes of the ``regions`` that resolve."""
+    iso3 = resolve(regions)
+    keep = np.flatnonzero(iso3 != None)  # noqa: E711
+    return keep, iso3[keep].tolist()
+
+
+# -------------------------------------------
+# Builders
+# -------------------------------------------
+def animated(regions, frames, values, colorscale, label):
+    """A choropleth animated over ``frames``; ``values[i, j]`` is region ``i`` in frame ``j``.
+
+    NaN values leave a country blank in that frame. The colour range spans
+    all frames, as ``range_color`` did.
+    """
+    keep, locations = _located(regions)
+    values = np.asarray(values, dtype=float)[keep]
+    names = [str(regions[i]) for i in keep]
+    zmin, zmax = float(np.nanmin(values)), float(np.nanmax(values))
+    # NaN serialises as null, which plotly leaves uncoloured
+    z = [np.where(np.isnan(column), None, column).tolist() for column in values.T]
+    labels = [str(frame) for frame in frames]
+
+    fig = go.Figure(
+        data=[go.Choropleth(
+            locations=locations, locationmode="ISO-3", z=z[0], text=names,
+            zmin=zmin, zmax=zmax, colorscale=colorscale, colorbar={"title": {"text": label}},
+            hovertemplate=f"<b>%{{text}}</b><br>{label}=%{{z}}<extra></extra>",
+        )],
+        frames=[go.Frame(name=name, data=[go.Choropleth(z=column)], traces=[0]) for name, column in zip(labels, z)],
+    )
+    step = {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "fromcurrent": True, "transition": {"duration": 0}}
+    fig.update_layout(
+        geo={"domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]}, "center": {}},
+        updatemenus=[{
+            "type": "buttons", "direction": "left", "showactive": False,
+            "x": 0.1, "xanchor": "right", "y": 0, "yanchor": "top", "pad": {"r": 10, "t": 70},
+            "buttons": [
+                {"label": "&#9654;", "method": "animate",
+                 "args": [None, {"frame": {"duration": 500, "redraw": True}, "mode": "immediate",
+                                 "fromcurrent": True, "transition": {"duration": 500, "easing": "linear"}}]},
+                {"label": "&#9724;", "method": "animate", "args": [[None], step]},
+            ],
+        }],
+        sliders=[{
+            "active": 0, "x": 0.1, "xanchor": "left", "y": 0, "yanchor": "top", "len": 0.9,
+            "pad": {"b": 10, "t": 60}, "currentvalue": {"prefix": "Year="},
+            "steps": [{"label": name, "method": "animate", "args": [[name], step]} for name in labels],
+        }],
+    )
+    return fig
+
+
+def categorical(regions, categories, colors):
+    """A choropleth with one legend entry per category, in order of first appearance."""
+    keep, locations = _located(regions)
+    locations = np.array(locations, dtype=object)
+    names = np.array([str(regions[i]) for i in keep], dtype=object)
+    categories = np.asarray(categories, dtype=object)[keep]
+    fig = go.Figure()
+    for category in dict.fromkeys(categories):
+        mask = categories == category
+        color = colors.get(category, "lightgray")
+        fig.add_trace(go.Choropleth(
+            locations=locations[mask].tolist(), locationmode="ISO-3", z=[1] * int(mask.sum()),
+            text=names[mask].tolist(), name=category, legendgroup=category, showlegend=True, showscale=False,
+            colorscale=[[0, color], [1, color]],
+            hovertemplate=f"<b>%{{text}}</b><br>effect={category}<extra></extra>",
+        ))
+    fig.update_layout(legend={"title": {"text": "effect"}})
+    return fig
+
+
+# -------------------------------------------
+# Page maps
+# -------------------------------------------
+@data.cached(data.data_path("Non_age_standardised_smoking_prevalence.csv"), data.data_path(LOCATIONS_FILE))
+def prevalence_map():
+    """Overall smoking prevalence by country, animated over the survey years."""
+    df = data.load_prevalence()
+    first, last = PREVALENCE_YEARS
+    df = df[(df["Year"] >= first) & (df["Year"] <= last)]
+    grid = df.pivot_table(index="Region", columns="Year", values="Overall use", aggfunc="first", observed=True)
+    fig = animated(grid.index.astype(str), grid.columns, grid.to_numpy(), "Turbo", PREVALENCE_LABEL)
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), width=1000, height=600)
+    return fig
+
+
+@data.cached(data.data_path("merged_tobacco_data.csv"))
+def policy_effects():
+    """Direction of the average MPOWER score and of overall use between 2008 and 2022, per country."""
+    df = data.load_merged().copy()
+    df.columns = [col.strip() for col in df.columns]
+    df["Region"] = df["Region"].astype(str)
+    df[POLICY_COLUMNS + ["Overall use"]] = df[POLICY_COLUMNS + ["Overall use"]].apply(pd.to_numeric, errors="coerce")
+    df["average_policy"] = df[POLICY_COLUMNS].mean(axis=1)
+    df = df.dropna(subset=["Region", "Year", "average_policy", "Overall use"])
+
+    df_2008 = df[df["Year"] == 2008].set_index("Region")
+    df_2022 = df[df["Year"] == 2022].set_index("Region")
+    common = df_2008.index.intersection(df_2022.index)
+    policy_diff = (df_2022.loc[common, "average_policy"] - df_2008.loc[common, "average_policy"]).to_numpy()
+    prevalence_diff = (df_2022.loc[common, "Overall use"] - df_2008.loc[common, "Overall use"]).to_numpy()
+    arrows = np.array(["↓", "=", "↑"], dtype=object)
+    effect = arrows[np.sign(policy_diff).astype(int) + 1] + arrows[np.sign(prevalence_diff).astype(int) + 1]
+    return common.to_numpy(), effect
+
+
+@data.cached(data.data_path("merged_tobacco_data.csv"), data.data_path(LOCATIONS_FILE))
+def effect_map():
+    """Countries coloured by :func:`policy_effects`."""
+    regions, effect = policy_effects()
+    fig = categorical(regions, effect, EFFECT_COLORS)
+    fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+    return fig
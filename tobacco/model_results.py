@@ -0,0 +1,82 @@
+"""Typed, indexed store of the machine-learning results in ``model.json``.
+
+``model.json`` nests entries by page section and model name. The Machine
+Learning page used to rebuild its tables on every rerun from lookups like
+``results["Random Forest Regressor"]["Models Without Region"]["Test MAE"]``.
+:class:`ModelResults` flattens the file once into:
+
+* a metrics table indexed on ``(Model, Experiment, Stratum)``;
+* one feature-importance frame per linear model.
+
+The stratified sections (``Gender``, ``Income``, ``Continent``) are linear
+regressions whose entries are strata. Every other section is a model whose
+entries are experiments on all countries.
+
+Views are memoized on the store, and :func:`load_store` keeps one store per
+process until ``model.json`` changes, so reruns of the page reuse the same
+frames.
+"""
+
+from collections import namedtuple
+
+import pandas as pd
+
+from tobacco import data
+
+MODEL_FILE = data.data_path("model.json")
+INDEX = ["Model", "Experiment", "Stratum"]
+METRICS = ["Train MAE", "Test MAE", "CV Train MAE", "CV Test MAE", "CV Test MAE SD"]
+ALL = "All"
+
+# Sections whose entries are strata of one linear-regression experiment
+STRATIFIED_SECTIONS = ("Gender", "Income", "Continent")
+
+Key = namedtuple("Key", INDEX)
+
+
+def key(section, name):
+    """The store key of a ``model.json`` entry."""
+    if section in STRATIFIED_SECTIONS:
+        return Key("Linear Regression", section, name)
+    return Key(section, name, ALL)
+
+
+class ModelResults:
+    """Metrics and coefficients of every trained model, keyed on :class:`Key`."""
+
+    def __init__(self, results):
+        rows, importances = [], {}
+        for section, entries in results.items():
+            for name, entry in entries.items():
+                k = key(section, name)
+                rows.append(list(k) + [entry.get(metric) for metric in METRICS])
+                if "Feature Importance" in entry:
+                    importances[k] = pd.DataFrame(
+                        list(entry["Feature Importance"].items()), columns=["Feature", "Importance"]
+                    ).set_index("Feature")
+        self.metrics = pd.DataFrame(rows, columns=INDEX + METRICS).set_index(INDEX).sort_index().astype(float)
+        self.importances = importances
+        self._views = {}
+
+    def importance(self, k):
+        """Coefficients of one linear model, largest magnitude first."""
+        return self.importances[Key(*k)]
+
+    def mae(self, columns):
+        """MAE rows (Train, Test and any cross-validated scores) × the labelled models of ``columns``.
+
+        ``columns`` is a sequence of ``(label, key)`` pairs. The table is built
+        once per store and selection.
+        """
+        columns = tuple((label, Key(*k)) for label, k in columns)
+        if columns not in self._views:
+            table = self.metrics.loc[[k for _, k in columns]].T
+            table.columns = [label for label, _ in columns]
+            table.index = [metric.replace(" MAE", "").replace(" SD", " (SD)") for metric in METRICS]
+            self._views[columns] = table.dropna(how="all")
+        return self._views[columns]
+
+
+@data.cached(MODEL_FILE)
+def load_store():
+    return ModelResults(data.load_json(MODEL_FILE))
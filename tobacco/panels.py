@@ -0,0 +1,126 @@
+"""Dense region × year panels of the exploratory tables, with one region dictionary.
+
+The Exploratory Analysis widgets used to filter whole tables with
+``isin(selected_countries)`` and year masks on every interaction. That
+scans every row, however few countries are selected. :class:`PanelStore`
+lays each table out once per data version:
+
+* a :class:`RegionDictionary` gives every region in any table an integer id;
+* each table becomes a :class:`DatasetPanel` holding
+  ``values[region_id, year_id, column]`` and an ``observed[region_id, year_id]``
+  mask of the rows the table has.
+
+A selection of countries and years is then a dictionary lookup per country
+and one fancy-index gather. Its cost depends on the size of the selection,
+not on the number of regions, so it stays flat if sub-national units are
+added.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tobacco import data, estimates
+
+# name -> (loader, value columns, data file)
+DATASETS = {
+    "prevalence": (data.load_prevalence,
+                   data.PREVALENCE_GROUPS + [g + suffix for g in data.PREVALENCE_GROUPS for suffix in estimates.SUFFIXES],
+                   "Non_age_standardised_smoking_prevalence.csv"),
+    "mpower": (data.load_mpower, data.MPOWER_POLICIES, "MPOWER.csv"),
+    "price": (data.load_price, ["Cigarette_price"], "CleanCigarettePrice.csv"),
+}
+
+Selection = namedtuple("Selection", ["regions", "years", "columns", "values", "observed"])
+Selection.__doc__ = """A gathered block: ``values[i, j, k]`` is region ``i`` in year ``j`` for column ``k``."""
+
+
+class RegionDictionary:
+    """Sorted region names and their integer ids."""
+
+    def __init__(self, names):
+        self.names = np.array(sorted(set(names)), dtype=object)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def encode(self, names):
+        """Ids of ``names`` in order; unknown names raise ``KeyError``."""
+        return np.fromiter((self._ids[name] for name in names), dtype=np.intp)
+
+
+class DatasetPanel(namedtuple("DatasetPanel", ["years", "columns", "values", "observed"])):
+    """One table as ``values[region_id, year_id, column]``; ``observed`` marks its rows."""
+
+    __slots__ = ()
+
+    def year_ids(self, years):
+        """Positions of ``years`` on the panel's year axis; years it lacks raise ``KeyError``."""
+        years = np.asarray(years, dtype=int)
+        ids = np.clip(np.searchsorted(self.years, years), 0, len(self.years) - 1)
+        if not np.array_equal(self.years[ids], years):
+            raise KeyError(f"years not in the panel: {sorted(set(years) - set(self.years))}")
+        return ids
+
+
+def lay_out(df, columns, regions):
+    """Scatter the rows of a long ``Region``/``Year`` table into a :class:`DatasetPanel` on ``regions``."""
+    region_ids = regions.encode(df["Region"].astype(str))
+    years, year_ids = np.unique(df["Year"].to_numpy(dtype=int), return_inverse=True)
+    values = np.full((len(regions), len(years), len(columns)), np.nan)
+    values[region_ids, year_ids] = df[columns].to_numpy(dtype=float)
+    observed = np.zeros((len(regions), len(years)), dtype=bool)
+    observed[region_ids, year_ids] = True
+    return DatasetPanel(years, list(columns), values, observed)
+
+
+class PanelStore:
+    """The :data:`DATASETS` as :class:`DatasetPanel` objects on one :class:`RegionDictionary`."""
+
+    def __init__(self, tables):
+        """``tables`` maps a dataset name to ``(DataFrame, value columns)``."""
+        self.regions = RegionDictionary(
+            name for df, _ in tables.values() for name in df["Region"].astype(str).unique()
+        )
+        self.panels = {name: lay_out(df, columns, self.regions) for name, (df, columns) in tables.items()}
+        self._available = {}
+
+    def available(self, name, years=None):
+        """Sorted names of the regions with a row in dataset ``name`` (in any of ``years``)."""
+        key = (name, None if years is None else tuple(years))
+        if key not in self._available:
+            panel = self.panels[name]
+            observed = panel.observed if years is None else panel.observed[:, panel.year_ids(years)]
+            self._available[key] = self.regions.names[observed.any(axis=1)].tolist()
+        return self._available[key]
+
+    def gather(self, name, regions, years=None, columns=None):
+        """The block of dataset ``name`` for ``regions`` × ``years`` × ``columns`` (all by default)."""
+        panel = self.panels[name]
+        regions = list(regions)
+        region_ids = self.regions.encode(regions)
+        year_ids = np.arange(len(panel.years)) if years is None else panel.year_ids(years)
+        columns = panel.columns if columns is None else list(columns)
+        column_ids = [panel.columns.index(column) for column in columns]
+        values = panel.values[np.ix_(region_ids, year_ids, column_ids)]
+        observed = panel.observed[np.ix_(region_ids, year_ids)]
+        return Selection(regions, panel.years[year_ids], columns, values, observed)
+
+    def frame(self, name, regions, years=None, columns=None):
+        """The observed rows of :meth:`gather` as a long ``Region``/``Year`` DataFrame."""
+        s = self.gather(name, regions, years, columns)
+        rows, cols = np.nonzero(s.observed)
+        out = pd.DataFrame(s.values[rows, cols], columns=s.columns)
+        out.insert(0, "Year", s.years[cols])
+        out.insert(0, "Region", np.asarray(s.regions, dtype=object)[rows])
+        return out
+
+
+@data.cached(*(data.data_path(file) for _, _, file in DATASETS.values()))
+def load_store():
+    return PanelStore({name: (loader(), columns) for name, (loader, columns, _) in DATASETS.items()})
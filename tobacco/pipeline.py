@@ -0,0 +1,429 @@
+"""Cleaning and merge pipeline from ``Notebooks/TobaccoProjectCleanVizMerge.ipynb``.
+
+Run it with::
+
+    python -m tobacco.pipeline [--out Data] [--force]
+
+Each stage is a cached node. Its fingerprint hashes the stage's source code,
+the module constants and helper functions it reads, the source of the
+``tobacco`` modules it calls, and the content of its inputs. The inputs are
+either raw files in ``Data/`` or the outputs of earlier stages. A stage only reruns when that
+fingerprint changes, and stages downstream of it only rerun when its output
+actually changed. If only ``tobaccoprice.csv`` changes, only the ``price`` and
+``merge`` stages run.
+
+Stage outputs are kept in ``Data/.pipeline/`` next to a ``manifest.json`` of
+fingerprints. They are only copied over the tables the pages read when
+``--out`` names a directory, such as ``--out Data``. A published file keeps the
+line endings of the file it replaces, so a run that changes nothing leaves
+the tree clean.
+
+The WHO age-standardised export and the raw tobacco control table are not in
+the repository, so ``CleanTobaccoUseStandardised.csv`` and
+``CleanTobaccoControl.csv`` are treated as raw inputs of the merge.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+from tobacco import countries, estimates, gapfill, gho, interpolation
+
+DATA_DIR = "Data"
+CACHE_DIR = os.path.join(DATA_DIR, ".pipeline")
+
+POLICIES = ["exposure_protect", "cessation_support", "risk_warning",
+            "advertisement_ban", "tax_increase", "media_campaign"]
+
+PREVALENCE_COLUMNS = ['Overall use', 'Male', 'Female', 'Non_age_standardised_tobacco_use',
+                      'Male(Non_age_standardised_tobacco_use)', 'Female(Non_age_standardised_tobacco_use)']
+
+Stage = namedtuple("Stage", ["name", "inputs", "output", "func"])
+
+STAGES = {}
+
+
+def stage(name, inputs, output):
+    """Register ``func(*input_paths) -> (DataFrame, write_index)`` as a pipeline stage.
+
+    ``inputs`` are names of earlier stages or file names in the data directory.
+    """
+    def decorator(func):
+        STAGES[name] = Stage(name, list(inputs), output, func)
+        return func
+    return decorator
+
+
+# -------------------------------------------
+# Stages
+# -------------------------------------------
+@stage("non_age_standardised", ["Non_age_standardised_smoking_prevalence.csv"],
+       "CleanTobaccoUseNonStandardised.csv")
+def clean_non_age_standardised(path):
+    non_age_standard = pd.read_csv(path)
+    non_age_standard = non_age_standard.rename({
+        'Unnamed: 0': 'Region', 'Unnamed: 1': 'Year',
+        'Estimate of current tobacco use prevalence (%)': 'Non_age_standardised_tobacco_use',
+        'Estimate of current tobacco use prevalence (%).1': 'Male(Non_age_standardised_tobacco_use)',
+        'Estimate of current tobacco use prevalence (%).2': 'Female(Non_age_standardised_tobacco_use)'}, axis=1)
+
+    # Drop the second header row
+    non_age_standard = non_age_standard.drop(index=0)
+    columns = PREVALENCE_COLUMNS[3:]
+    non_age_standard = non_age_standard[['Region', 'Year'] + columns].copy()
+
+    # "31.4 [25.1-38.0]" -> 31.4; the cleaned table keeps the point estimates only
+    non_age_standard[columns] = estimates.parse(non_age_standard[columns]).point
+    non_age_standard['Year'] = non_age_standard['Year'].astype(int)
+    non_age_standard = non_age_standard.sort_values(by=['Region', 'Year']).reset_index(drop=True)
+    return non_age_standard, False
+
+
+@stage("mpower", ["MPOWER.csv"], "CleanMPOWER.csv")
+def clean_mpower(path):
+    emp = pd.read_csv(path)
+    emp = emp.rename(columns={
+        "Countries, territories and areas": "Region",
+        "Protect from tobacco smoke": "exposure_protect",
+        "Offer help to quit tobacco use": "cessation_support",
+        "Warn about the dangers of tobacco": "risk_warning",
+        "Enforce bans on tobacco advertising": "advertisement_ban",
+        "Raise taxes on tobacco": "tax_increase",
+        "Anti-tobacco mass media campaigns": "media_campaign"})
+
+    # "Not applicable" becomes 0 (no data)
+    emp[["tax_increase", "media_campaign"]] = emp[["tax_increase", "media_campaign"]].replace("Not applicable", 0)
+    emp[POLICIES] = emp[POLICIES].apply(pd.to_numeric, errors="coerce")
+
+    # Rescale 2 → 1, 3 → 2, 4 → 3, 5 → 4, only while the table is still on the original scale
+    if emp[POLICIES].isin([5]).any().any():
+        emp[POLICIES] = emp[POLICIES].replace({2: 1, 3: 2, 4: 3, 5: 4})
+
+    # Fill "no data" protection scores from neighbouring years. Zeros in tax_increase and
+    # media_campaign mean "Not applicable" and are kept.
+    emp = gapfill.fill_zero_scores(emp, ["exposure_protect"])
+    return emp, False
+
+
+# Countries the World Bank table names too differently for fuzzy matching
+COUNTRY_CLASSIFICATION = {
+    "Bahamas": {"Income Group": "High income", "Continental Classification": "Latin America & Caribbean"},
+    "Bolivia (Plurinational State of)": {"Income Group": "Lower middle income", "Continental Classification": "Latin America & Caribbean"},
+    "Congo": {"Income Group": "Lower middle income", "Continental Classification": "Sub-Saharan Africa"},
+    "Cook Islands": {"Income Group": "High income", "Continental Classification": "East Asia & Pacific"},
+    "Côte d'Ivoire": {"Income Group": "Lower middle income", "Continental Classification": "Sub-Saharan Africa"},
+    "Democratic People's Republic of Korea": {"Income Group": "Low income", "Continental Classification": "East Asia & Pacific"},
+    "Democratic Republic of the Congo": {"Income Group": "Low income", "Continental Classification": "Sub-Saharan Africa"},
+    "Egypt": {"Income Group": "Lower middle income", "Continental Classification": "Middle East & North Africa"},
+    "Gambia": {"Income Group": "Low income", "Continental Classification": "Sub-Saharan Africa"},
+    "Iran (Islamic Republic of)": {"Income Group": "Upper middle income", "Continental Classification": "Middle East & North Africa"},
+    "Kyrgyzstan": {"Income Group": "Lower middle income", "Continental Classification": "Europe & Central Asia"},
+    "Lao People's Democratic Republic": {"Income Group": "Lower middle income", "Continental Classification": "East Asia & Pacific"},
+    "Micronesia (Federated States of)": {"Income Group": "Lower middle income", "Continental Classification": "East Asia & Pacific"},
+    "Netherlands (Kingdom of the)": {"Income Group": "High income", "Continental Classification": "Europe & Central Asia"},
+    "Niue": {"Income Group": "High income", "Continental Classification": "East Asia & Pacific"},
+    "Republic of Korea": {"Income Group": "High income", "Continental Classification": "East Asia & Pacific"},
+    "Republic of Moldova": {"Income Group": "Lower middle income", "Continental Classification": "Europe & Central Asia"},
+    "Saint Kitts and Nevis": {"Income Group": "High income", "Continental Classification": "Latin America & Caribbean"},
+    "Saint Lucia": {"Income Group": "Upper middle income", "Continental Classification": "Latin America & Caribbean"},
+    "Saint Vincent and the Grenadines": {"Income Group": "Upper middle income", "Continental Classification": "Latin America & Caribbean"},
+    "Sao Tome and Principe": {"Income Group": "Lower middle income", "Continental Classification": "Sub-Saharan Africa"},
+    "Slovakia": {"Income Group": "High income", "Continental Classification": "Europe & Central Asia"},
+    "Türkiye": {"Income Group": "Upper middle income", "Continental Classification": "Europe & Central Asia"},
+    "United Kingdom of Great Britain and Northern Ireland": {"Income Group": "High income", "Continental Classification": "Europe & Central Asia"},
+    "United Republic of Tanzania": {"Income Group": "Low income", "Continental Classification": "Sub-Saharan Africa"},
+    "United States of America": {"Income Group": "High income", "Continental Classification": "North America"},
+    "Venezuela (Bolivarian Republic of)": {"Income Group": "Upper middle income", "Continental Classification": "Latin America & Caribbean"},
+    "Viet Nam": {"Income Group": "Lower middle income", "Continental Classification": "East Asia & Pacific"},
+    "Yemen": {"Income Group": "Low income", "Continental Classification": "Middle East & North Africa"},
+    "occupied Palestinian territory, including East Jerusalem": {"Income Group": "Lower middle income", "Continental Classification": "Middle East & North Africa"},
+}
+
+INCOME_GROUPS = {"High income": "HIC", "Upper middle income": "UMIC",
+                 "Lower middle income": "LMIC", "Low income": "LIC"}
+
+
+def load_income_groups(path):
+    """World Bank income groups with WB regions as ``Continental Classification``."""
+    ic = pd.read_csv(path, sep=",", encoding="ISO-8859-1")
+    ic = ic.drop(["Lending category", "Code"], axis=1)
+    ic = ic.rename(columns={"Region": "Continental Classification", "Economy": "Region", "Income group": "Income Group"})
+    ic["Income Group"] = ic["Income Group"].replace(INCOME_GROUPS)
+
+    # Aggregates have no region; Venezuela is missing its income group
+    ic = ic.dropna(subset=["Continental Classification"])
+    ic["Region"] = ic["Region"].str.strip()
+    ic.loc[(ic["Region"] == "Venezuela") & (ic["Income Group"].isna()), "Income Group"] = "UMIC"
+    return ic
+
+
+# WHO names whose World Bank spelling is too different for fuzzy matching
+COUNTRY_ALIASES = {
+    "Bahamas": "Bahamas, The",
+    "Bolivia (Plurinational State of)": "Bolivia",
+    "Democratic People's Republic of Korea": "Korea, Dem. People's Rep.",
+    "Democratic Republic of the Congo": "Congo, Dem. Rep.",
+    "Egypt": "Egypt, Arab Rep.",
+    "Gambia": "Gambia, The",
+    "Iran (Islamic Republic of)": "Iran, Islamic Rep.",
+    "Kyrgyzstan": "Kyrgyz Republic",
+    "Lao People's Democratic Republic": "Lao PDR",
+    "Micronesia (Federated States of)": "Micronesia, Fed. Sts.",
+    "Netherlands (Kingdom of the)": "Netherlands",
+    "Republic of Korea": "Korea, Rep.",
+    "Saint Kitts and Nevis": "St. Kitts and Nevis",
+    "Saint Lucia": "St. Lucia",
+    "Saint Vincent and the Grenadines": "St. Vincent and the Grenadines",
+    "Slovakia": "Slovak Republic",
+    "United States of America": "United States",
+    "Venezuela (Bolivarian Republic of)": "Venezuela, RB",
+    "Viet Nam": "Vietnam",
+    "Yemen": "Yemen, Rep.",
+}
+
+
+@stage("classification", ["mpower", "IncomeGroup.csv"], "CleanCountryClassification.csv")
+def classify_countries(mpower_path, income_path):
+    emp = pd.read_csv(mpower_path)
+    ic = load_income_groups(income_path)
+
+    # World Bank name for every WHO name, from the alias table or a fuzzy score of at least 90.
+    # Decisions are kept next to the stage outputs so reruns only score new names.
+    resolver = countries.CountryResolver(ic["Region"].unique(), aliases=COUNTRY_ALIASES, threshold=90)
+    decisions = os.path.join(os.path.dirname(mpower_path), "country_matches.json")
+    resolver.load(decisions)
+    matches = resolver.resolve_all(emp["Region"])
+    resolver.save(decisions)
+    emp["Fuzzy Region"] = emp["Region"].map(matches).fillna("No match")
+
+    emp_ic = emp.merge(ic, left_on="Fuzzy Region", right_on="Region", how="left", suffixes=('_emp', '_ic'))
+
+    # Fill countries missing from the World Bank table from the hand-written table
+    manual = pd.DataFrame.from_dict(COUNTRY_CLASSIFICATION, orient="index")
+    for col in ["Continental Classification", "Income Group"]:
+        emp_ic[col] = emp_ic[col].fillna(emp_ic["Region_emp"].map(manual[col]))
+    emp_ic["Income Group"] = emp_ic["Income Group"].replace(INCOME_GROUPS)
+
+    df = emp_ic.rename(columns={'Region_emp': 'Region'})
+    df = df.drop(['Fuzzy Region', 'Region_ic'], axis=1)
+    return df, True
+
+
+# Countries without price data in the WHO extract
+PRICE_EXCLUDE = ['Cook Islands', 'Cuba', "Democratic People's Republic of Korea", 'Monaco', 'Niue']
+
+
+@stage("price", ["tobaccoprice.csv"], "CleanCigarettePrice.csv")
+def clean_price(path):
+    # Keep the price of the most sold brand in international dollars (PPP)
+    price = gho.ingest(path, gho.PRICE)
+    price = price[~price.Region.isin(PRICE_EXCLUDE)]
+
+    price["Cigarette_price"] = price.groupby("Region")["Cigarette_price"].transform(lambda x: x.fillna(x.mean()))
+    price["Cigarette_price"] = price["Cigarette_price"].round(2)
+    return price.reset_index(drop=True), False
+
+
+# Countries missing from the prevalence tables or without price data
+MERGE_EXCLUDE = ['Angola', 'Antigua and Barbuda', 'Central African Republic',
+                 'Djibouti', 'Dominica', 'Equatorial Guinea', 'Eritrea', 'Gabon',
+                 'Grenada', 'Guinea', 'Libya', 'Micronesia (Federated States of)',
+                 'Monaco', 'Mozambique', 'Nicaragua', 'Niue', 'North Macedonia',
+                 'Saint Kitts and Nevis', 'Saint Vincent and the Grenadines',
+                 'San Marino', 'Somalia', 'South Sudan', 'Sudan', 'Suriname',
+                 'Syrian Arab Republic', 'Tajikistan', 'Trinidad and Tobago',
+                 'Vanuatu', 'Venezuela (Bolivarian Republic of)',
+                 'occupied Palestinian territory, including east Jerusalem',
+                 'Cook Islands', 'Cuba', "Democratic People's Republic of Korea"]
+
+
+@stage("merge", ["CleanTobaccoUseStandardised.csv", "non_age_standardised", "CleanTobaccoControl.csv",
+                 "price", "classification"], "merged_tobacco_data.csv")
+def merge_tables(age_path, nonage_path, control_path, price_path, classification_path):
+    age = pd.read_csv(age_path)
+    nonage = pd.read_csv(nonage_path)
+    control = pd.read_csv(control_path)
+    pricing = pd.read_csv(price_path)
+    df = pd.read_csv(classification_path, index_col=0)
+
+    tables = []
+    for table in (age, nonage, control, pricing, df):
+        table["Region"] = table["Region"].replace('Türkiye', 'Turkiye')
+        tables.append(table[~table.Region.isin(MERGE_EXCLUDE)])
+    age, nonage, control, pricing, df = tables
+
+    # Keep 2007 in the prevalence tables so 2008 can be interpolated, drop projections
+    age = age[(age.Year >= 2007) & (age.Year < 2023)]
+    nonage = nonage[(nonage.Year >= 2007) & (nonage.Year < 2023)]
+    df = df[(df.Year > 2007) & (df.Year < 2023)]
+
+    merged = pd.merge(age, nonage, on=['Region', 'Year'], how='outer')
+    merged = pd.merge(merged, control, on=['Region', 'Year'], how='outer')
+    merged = pd.merge(merged, pricing, on=['Region', 'Year'], how='outer')
+    merged = pd.merge(merged, df, on=['Region', 'Year'], how='outer')
+
+    # Interpolate the prevalence columns onto the policy years, then fill the edges within each country
+    panel = interpolation.align([merged[['Region', 'Year'] + PREVALENCE_COLUMNS]])
+    panel = interpolation.interpolate(panel, limit_direction="forward")
+    filled = panel.frame().set_index(['Region', 'Year'])
+    keys = pd.MultiIndex.from_frame(merged[['Region', 'Year']])
+    merged[PREVALENCE_COLUMNS] = filled.reindex(keys)[PREVALENCE_COLUMNS].to_numpy()
+    merged[PREVALENCE_COLUMNS] = merged.groupby("Region")[PREVALENCE_COLUMNS].transform(lambda s: s.ffill().bfill())
+
+    merged = merged[~merged.Year.isin([2007, 2015, 2021])].reset_index(drop=True)
+    merged[PREVALENCE_COLUMNS] = merged[PREVALENCE_COLUMNS].round(2)
+    merged.Cigarette_price = merged.Cigarette_price.fillna(merged.Cigarette_price.median())
+    return merged, True
+
+
+# -------------------------------------------
+# Runner
+# -------------------------------------------
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _code_names(code):
+    """Global names read by ``code`` and the functions and lambdas nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _module_sources(module, seen):
+    """Add the source of ``module`` and of the ``tobacco`` modules it imports to ``seen``."""
+    if module.__name__ in seen:
+        return
+    seen[module.__name__] = inspect.getsource(module)
+    for value in vars(module).values():
+        if inspect.ismodule(value) and value.__name__.startswith("tobacco."):
+            _module_sources(value, seen)
+
+
+def dependencies(func, seen=None):
+    """Source texts and constant values ``func`` depends on, keyed by name.
+
+    Module-level helpers of this module are followed. ``tobacco`` modules
+    contribute their whole source and that of the ``tobacco`` modules they
+    import. Constants such as :data:`COUNTRY_ALIASES` contribute their
+    ``repr``. Third-party modules are left out.
+    """
+    seen = {} if seen is None else seen
+    for name in sorted(_code_names(func.__code__)):
+        value = func.__globals__.get(name)
+        if name in seen or value is None:
+            continue
+        if inspect.ismodule(value):
+            if value.__name__.startswith("tobacco."):
+                _module_sources(value, seen)
+        elif inspect.isfunction(value) and value.__module__ == func.__module__:
+            seen[name] = inspect.getsource(value)
+            dependencies(value, seen)
+        elif isinstance(value, (dict, list, tuple, str, int, float)):
+            seen[name] = repr(value)
+    return seen
+
+
+def fingerprint(stage, input_hashes):
+    """Hash of a stage's code, the code and constants it uses and the content hashes of its inputs."""
+    digest = hashlib.sha256(inspect.getsource(stage.func).encode())
+    for name, text in sorted(dependencies(stage.func).items()):
+        digest.update(f"{name}\0{text}".encode())
+    for h in input_hashes:
+        digest.update(h.encode())
+    return digest.hexdigest()
+
+
+def _load_manifest(cache_dir):
+    path = os.path.join(cache_dir, "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(cache_dir, manifest):
+    with open(os.path.join(cache_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def publish(output, published):
+    """Copy ``output`` to ``published`` with the line endings of the file it replaces.
+
+    Returns whether ``published`` was written.
+    """
+    with open(output, "rb") as f:
+        content = f.read()
+    if os.path.exists(published):
+        with open(published, "rb") as f:
+            current = f.read()
+        if current.split(b"\n", 1)[0].endswith(b"\r"):
+            content = content.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+        if current == content:
+            return False
+    with open(published, "wb") as f:
+        f.write(content)
+    return True
+
+
+def run(data_dir=DATA_DIR, out_dir=None, cache_dir=CACHE_DIR, force=False, log=print):
+    """Run every stage whose fingerprint changed and publish all outputs to ``out_dir``.
+
+    With ``out_dir=None`` the outputs stay in ``cache_dir``. Returns the names
+    of the stages that were executed.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(cache_dir)
+    paths, hashes, executed = {}, {}, []
+
+    for stage in STAGES.values():
+        inputs = []
+        for name in stage.inputs:
+            if name in STAGES:
+                inputs.append(paths[name])
+            else:
+                path = os.path.join(data_dir, name)
+                paths[name], hashes[name] = path, file_hash(path)
+                inputs.append(path)
+        fp = fingerprint(stage, [hashes[name] for name in stage.inputs])
+
+        output = os.path.join(cache_dir, stage.output)
+        entry = manifest.get(stage.name, {})
+        if force or entry.get("fingerprint") != fp or not os.path.exists(output):
+            df, index = stage.func(*inputs)
+            df.to_csv(output, index=index)
+            entry = {"fingerprint": fp, "output": file_hash(output)}
+            manifest[stage.name] = entry
+            _save_manifest(cache_dir, manifest)
+            executed.append(stage.name)
+            log(f"{stage.name}: ran")
+        else:
+            log(f"{stage.name}: cached")
+        paths[stage.name], hashes[stage.name] = output, entry["output"]
+
+        if out_dir is not None and publish(output, os.path.join(out_dir, stage.output)):
+            log(f"{stage.name}: published")
+    return executed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DATA_DIR, help="directory holding the raw inputs")
+    parser.add_argument("--out", default=None, help="directory to publish the cleaned tables to, e.g. Data")
+    parser.add_argument("--cache", default=CACHE_DIR, help="directory for cached stage outputs")
+    parser.add_argument("--force", action="store_true", help="rerun every stage")
+    args = parser.parse_args()
+    run(args.data, args.out, args.cache, args.force)
@@ -0,0 +1,89 @@
+"""Seeded, region-indexed view of the cigarette prices for the price scatter.
+
+The Exploratory Analysis page filtered the cached price table on every rerun
+and added ``Jittered_Year`` from an unseeded ``np.random.uniform``, so the
+points moved on every rerun and differed between viewers. :class:`PriceView`
+works on the price panel of :func:`tobacco.panels.load_store` and is built
+once per data version:
+
+* it draws a seeded jitter for every region × year cell;
+* it flattens the observed cells once, for the all-countries scatter.
+
+A selection of countries is then one gather per country along the region
+axis of the panel.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from tobacco import data, panels
+
+JITTER = 0.5
+SEED = 2024
+
+PALETTE = px.colors.qualitative.Plotly
+HOVER = "Region=%{text}<br>Year=%{customdata}<br>Cigarette_price=%{y}<extra></extra>"
+
+Series = namedtuple("Series", ["region", "year", "jittered_year", "price"])
+Series.__doc__ = """One region's observed price points."""
+
+
+class PriceView:
+    """The price panel of a :class:`~tobacco.panels.PanelStore` with a seeded jitter on the year."""
+
+    def __init__(self, store, jitter=JITTER, seed=SEED):
+        self.store = store
+        self.panel = panel = store.panels["price"]
+        self.regions = store.available("price")
+        rng = np.random.default_rng(seed)
+        # One draw per region × year cell, so a country's points sit in the same place in every selection
+        self.jitter = rng.uniform(-jitter, jitter, size=panel.observed.shape)
+
+        region_ids, year_ids = np.nonzero(panel.observed)
+        self.year = panel.years[year_ids]
+        self.jittered_year = self.year + self.jitter[region_ids, year_ids]
+        self.price = panel.values[region_ids, year_ids, 0]
+        codes = np.unique(region_ids, return_inverse=True)[1]
+        self.names = store.regions.names[region_ids]
+        self.colors = np.asarray(PALETTE, dtype=object)[codes % len(PALETTE)]
+
+    def series(self, region):
+        i = self.store.regions.encode([region])[0]
+        observed = self.panel.observed[i]
+        year = self.panel.years[observed]
+        return Series(region, year, year + self.jitter[i, observed], self.panel.values[i, observed, 0])
+
+    def select(self, regions=None):
+        """The :class:`Series` of ``regions`` in the given order, or of every region for ``None``.
+
+        Unknown regions are skipped.
+        """
+        regions = self.regions if regions is None else [r for r in regions if r in self.store.regions]
+        return [self.series(region) for region in regions]
+
+    def scatter(self, regions=None, opacity=0.7):
+        """The price scatter coloured by region as ``px.scatter(color="Region")`` would.
+
+        A selection of ``regions`` draws one trace per region, with a legend.
+        All regions (``None``) are drawn as a single trace over the view's
+        arrays, coloured per point and without a legend.
+        """
+        if regions is None:
+            traces = [go.Scatter(x=self.jittered_year, y=self.price, customdata=self.year, text=self.names,
+                                 marker={"color": self.colors}, showlegend=False)]
+        else:
+            traces = [go.Scatter(x=s.jittered_year, y=s.price, customdata=s.year, text=[s.region] * len(s.year),
+                                 name=s.region, marker={"color": PALETTE[i % len(PALETTE)]})
+                      for i, s in enumerate(self.select(regions))]
+        fig = go.Figure(data=traces)
+        fig.update_traces(mode="markers", opacity=opacity, hovertemplate=HOVER)
+        fig.update_layout(legend={"title": {"text": "Region"}}, showlegend=regions is not None)
+        return fig
+
+
+@data.cached(*(data.data_path(file) for _, _, file in panels.DATASETS.values()))
+def load_view():
+    return PriceView(panels.load_store())
@@ -0,0 +1,111 @@
+"""Typed, memory-mappable snapshots of the tables in ``Data/``.
+
+``python -m tobacco.snapshots`` runs every table loader registered in
+:mod:`tobacco.data` once against the CSV files and writes the result as an
+uncompressed Arrow IPC file under ``Data/snapshots/``. Text columns that
+identify a country or group are stored as categoricals and numeric columns are
+downcast wherever that is lossless. The loaders apply the same :func:`compact`
+when they parse a CSV, and the index is stored with the table, so a loader
+returns the same frame with or without a snapshot.
+
+Each snapshot records the size and modification time of the CSV files it was
+built from and of the modules that parse them. :func:`read` memory-maps a snapshot only while those still match,
+otherwise it returns ``None`` and the loader parses the CSV as before.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # snapshots are an optimisation, loaders fall back to CSV
+    pa = None
+
+SNAPSHOT_DIR = os.path.join("Data", "snapshots")
+
+CATEGORICAL_COLUMNS = ["Region", "Continental Classification", "Income Group"]
+
+_METADATA_KEY = b"tobacco.sources"
+
+
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, name + ".arrow")
+
+
+def _source_stamp(paths):
+    stamp = {}
+    for path in paths:
+        st = os.stat(path)
+        stamp[path] = [st.st_size, st.st_mtime_ns]
+    return stamp
+
+
+def compact(df):
+    """Return ``df`` with categorical group columns and lossless numeric downcasts."""
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = s.astype("category")
+        elif pd.api.types.is_integer_dtype(s):
+            df[col] = pd.to_numeric(s, downcast="integer")
+        elif pd.api.types.is_float_dtype(s):
+            values = s.to_numpy()
+            finite = values[~np.isnan(values)]
+            if not s.isna().any() and np.array_equal(finite, np.round(finite)):
+                df[col] = pd.to_numeric(s.astype("int64"), downcast="integer")
+            elif np.array_equal(finite.astype(np.float32).astype(np.float64), finite):
+                df[col] = s.astype(np.float32)
+    return df
+
+
+def write(name, df, sources):
+    """Write ``df`` as snapshot ``name``, stamped with the ``sources`` it came from."""
+    table = pa.Table.from_pandas(compact(df), preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_METADATA_KEY] = json.dumps(_source_stamp(sources)).encode()
+    table = table.replace_schema_metadata(metadata)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path(name)
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def read(name, sources):
+    """Memory-map snapshot ``name`` if it is current for ``sources``, else return ``None``."""
+    path = snapshot_path(name)
+    if pa is None or not os.path.exists(path):
+        return None
+    # The mapped buffers outlive the file handle, so the views stay valid once it is closed
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        stamp = (reader.schema.metadata or {}).get(_METADATA_KEY)
+        if stamp is None or json.loads(stamp) != _source_stamp(sources):
+            return None
+        # split_blocks keeps null-free numeric columns as views onto the mapped file
+        return reader.read_all().to_pandas(split_blocks=True)
+
+
+def build(tables):
+    """Snapshot every ``name -> (parse, sources)`` entry of ``tables``."""
+    written = []
+    for name, (parse, sources) in tables.items():
+        written.append(write(name, parse(), sources))
+    return written
+
+
+if __name__ == "__main__":
+    if pa is None:
+        sys.exit("pyarrow is required to build snapshots")
+    from tobacco import data
+    for path in build(data.TABLES):
+        print(path)
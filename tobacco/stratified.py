@@ -0,0 +1,187 @@
+"""Batched stratified fixed-effects regressions and the tidy results store.
+
+The notebook fitted one ``smf.ols`` model per income group, continent and
+gender by hand, and the Statistical page showed the outcomes as separate
+result CSVs. :func:`fit_strata` fits every stratum and every outcome of a
+stratification in one pass.
+
+Regions are nested in their stratum, so one demeaning of the stacked panel by
+``stratum × Region`` and ``stratum × Year`` gives every stratum its own
+two-way fixed effects. All outcomes and regressors are demeaned together, and
+only the small ``k × k`` solves run per stratum and outcome. Standard errors
+are clustered by region, falling back to HC3 for strata with fewer than
+``min_clusters`` regions, as in the notebook.
+
+Run ``python -m tobacco.stratified`` to refit :data:`SPECS` and write the
+results to ``Data/policy_estimates.csv``. :class:`ResultsStore` serves that
+table to the page, indexed on stratification, outcome, stratum and variable.
+"""
+
+import argparse
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tobacco import data, fixed_effects
+
+POLICIES = ['Cigarette_price', 'exposure_protect', 'cessation_support', 'risk_warning',
+            'advertisement_ban', 'tax_increase', 'media_campaign']
+OUTCOMES = ['Overall_use', 'Male', 'Female']
+
+ESTIMATES_FILE = "policy_estimates.csv"
+BOOTSTRAP_FILE = "policy_bootstrap.csv"
+UNCERTAINTY_FILE = "policy_uncertainty.csv"
+INDEX = ["Stratification", "Outcome", "Stratum", "Variable"]
+
+Spec = namedtuple("Spec", ["name", "by", "outcomes", "regressors"])
+Spec.__doc__ = """A stratification: ``by`` is a panel column, or ``None`` for the pooled model."""
+
+SPECS = [
+    Spec("Pooled", None, OUTCOMES, POLICIES),
+    Spec("Income Group", "Income_Group", OUTCOMES, POLICIES),
+    Spec("Continent", "Continental_Classification", OUTCOMES, POLICIES),
+]
+
+# Display names of the regressors in the interpretation notes
+POLICY_NAMES = {
+    "Cigarette_price": "Cigarette Price", "exposure_protect": "Exposure Protection",
+    "cessation_support": "Cessation Support", "risk_warning": "Risk Warning",
+    "advertisement_ban": "Advertisement Ban", "tax_increase": "Tax Increase", "media_campaign": "Media Campaign",
+}
+
+
+def _recode(codes):
+    return np.unique(codes, return_inverse=True)[1]
+
+
+Design = namedtuple("Design", ["stratum", "rows", "codes", "clusters", "raw", "within", "cov_type"])
+Design.__doc__ = """The rows of one stratum with their raw and demeaned outcome and regressor columns."""
+
+
+def designs(df, spec, absorb=("Region", "Year"), cov_type="cluster", min_clusters=10):
+    """Demean ``spec``'s columns once and yield the :class:`Design` of every stratum.
+
+    The first ``len(spec.outcomes)`` columns of ``raw`` and ``within`` are the
+    outcomes, the rest the regressors.
+    """
+    columns = list(spec.outcomes) + list(spec.regressors)
+    df = df.dropna(subset=columns + ([spec.by] if spec.by else []))
+    strata = df[spec.by].to_numpy() if spec.by else np.full(len(df), "All", dtype=object)
+    stratum_codes, labels = pd.factorize(strata)
+
+    # Interacting the fixed effects with the stratum demeans every stratum in one sweep
+    codes = []
+    for col in absorb:
+        level = pd.factorize(df[col])[0]
+        codes.append(_recode(stratum_codes * (level.max() + 1) + level))
+    raw = df[columns].to_numpy(dtype=float)
+    within = fixed_effects.demean(raw, codes)
+    regions = pd.factorize(df[absorb[0]])[0]
+
+    for s, label in enumerate(labels):
+        rows = np.flatnonzero(stratum_codes == s)
+        clusters = _recode(regions[rows])
+        n_regions = int(clusters.max()) + 1
+        stratum_cov = cov_type if cov_type != "cluster" or n_regions >= min_clusters else "HC3"
+        yield Design(label, df.index[rows], [_recode(c[rows]) for c in codes], clusters,
+                     raw[rows], within[rows], stratum_cov)
+
+
+def fit_strata(df, spec, absorb=("Region", "Year"), cov_type="cluster", min_clusters=10):
+    """Fit every stratum and outcome of ``spec`` and return one tidy table.
+
+    The table has one row per stratum, outcome and regressor with the
+    coefficient, standard error, p-value, number of observations and regions
+    and the covariance type used.
+    """
+    n_out = len(spec.outcomes)
+    frames = []
+    for design in designs(df, spec, absorb, cov_type, min_clusters):
+        X = design.within[:, n_out:]
+        for j, outcome in enumerate(spec.outcomes):
+            result = fixed_effects.estimate(design.raw[:, j], design.within[:, j], X, list(spec.regressors),
+                                            design.codes, design.cov_type, design.clusters, design.rows)
+            frames.append(pd.DataFrame({
+                "Stratification": spec.name, "Outcome": outcome, "Stratum": design.stratum,
+                "Variable": result.params.index,
+                "Coefficient": result.params.to_numpy(),
+                "Std. Error": result.bse.to_numpy(),
+                "P-Value": result.pvalues.to_numpy(),
+                "N": result.nobs, "Regions": int(design.clusters.max()) + 1, "Covariance": design.cov_type,
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def fit_all(specs=SPECS, df=None):
+    """Fit every spec on the statistical panel and stack the tidy tables."""
+    df = data.load_statistical_panel() if df is None else df
+    return pd.concat([fit_strata(df, spec) for spec in specs], ignore_index=True)
+
+
+class ResultsStore:
+    """Tidy estimates indexed on ``(Stratification, Outcome, Stratum, Variable)``."""
+
+    def __init__(self, estimates):
+        self.estimates = estimates.set_index(INDEX).sort_index()
+
+    def table(self, stratification, outcome):
+        """Coefficients of one stratification and outcome, one row per stratum and variable."""
+        return self.estimates.loc[(stratification, outcome)]
+
+    def pivot(self, stratification, outcome, digits=3, p_value="P-Value"):
+        """Strata × variables with ``coefficient (P = p)`` cells for display.
+
+        ``p_value`` picks the p-value column, e.g. ``"Bootstrap P-Value"``.
+        """
+        table = self.table(stratification, outcome)
+        cells = (table["Coefficient"].round(digits).astype(str)
+                 + " (P = " + table[p_value].round(3).astype(str) + ")")
+        return cells.unstack("Variable")[POLICIES]
+
+    def notes(self, stratification, outcome, p_value="P-Value", alpha=0.1, strong=0.05):
+        """The policies with ``p_value`` below ``alpha`` in every stratum, with their interpretation.
+
+        The notes are written from the estimates, so they always agree with
+        :meth:`pivot`. Effects with a p-value of at least ``strong`` are
+        marked as borderline. A stratum without any such policy gets a single
+        "None" row.
+        """
+        table = self.table(stratification, outcome)
+        rows = []
+        for stratum, group in table.groupby(level="Stratum", sort=False):
+            found = group[group[p_value] < alpha].droplevel("Stratum")
+            for variable, row in found.iterrows():
+                where = "prices are higher" if variable == "Cigarette_price" else "the policy is stronger"
+                if row["Coefficient"] < 0:
+                    note = f"Lower tobacco use where {where}"
+                else:
+                    note = f"Higher tobacco use where {where} (counterintuitive)"
+                if row[p_value] >= strong:
+                    note += "; borderline"
+                rows.append((stratum, POLICY_NAMES.get(variable, variable),
+                             round(row["Coefficient"], 3), round(row[p_value], 3), note))
+            if found.empty:
+                rows.append((stratum, "None", None, None, f"No policy effect with p < {alpha:g}"))
+        notes = pd.DataFrame(rows, columns=["Stratum", "Policy", "Coefficient", p_value, "Interpretation"])
+        return notes.set_index("Stratum")
+
+
+@data.cached(data.data_path(ESTIMATES_FILE), data.data_path(BOOTSTRAP_FILE), data.data_path(UNCERTAINTY_FILE))
+def load_store():
+    """The estimates, with the results of :mod:`tobacco.bootstrap` and :mod:`tobacco.uncertainty` when present."""
+    estimates = pd.read_csv(data.data_path(ESTIMATES_FILE))
+    for extra in (BOOTSTRAP_FILE, UNCERTAINTY_FILE):
+        if os.path.exists(data.data_path(extra)):
+            estimates = estimates.merge(pd.read_csv(data.data_path(extra)), on=INDEX, how="left")
+    return ResultsStore(estimates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the stratified fixed-effects models")
+    parser.add_argument("--out", default=data.data_path(ESTIMATES_FILE), help="tidy results file")
+    args = parser.parse_args()
+    estimates = fit_all()
+    estimates.to_csv(args.out, index=False)
+    print(estimates[estimates["P-Value"] < 0.1].to_string(index=False))
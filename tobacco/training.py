@@ -0,0 +1,501 @@
+"""Parallel training harness for the models of ``TobaccoProjectMLandStatistics.ipynb``.
+
+Run it with::
+
+    python -m tobacco.training [--out Data/model.json] [--workers N] [--only SECTION ...]
+
+The notebook trained every model with its own ``train_model`` call and
+re-dropped columns before each one. Here the merged table is encoded once into
+a single float matrix. It holds the ordinal income group, the continent
+dummies, both region encodings, the clusters, the lag features and the
+targets. Every model is an :class:`Experiment`: a row of a declarative grid
+naming a target, a feature set, an optional stratum and an estimator.
+
+The encoded matrix is put in shared memory, and the workers of a process pool
+attach to it without copying. Each experiment is fitted exactly as in the
+notebook: the last ``GroupShuffleSplit`` on ``Region`` (test size 0.2, seed 42), then
+``StandardScaler``, the estimator, and train/test MAE. Linear models also
+record their coefficients, sorted by absolute size. The results are written
+into ``model.json`` in the layout the Machine Learning page reads; entries
+that were not rerun are kept.
+
+The optimised forest and XGBoost models search their parameter grids by
+successive halving (``--search halving``, the default). Boosting rounds or
+trees are the budget: every configuration starts with the smallest
+``n_estimators`` of the grid and the last rung uses the largest. The rungs
+in between grow geometrically, so they need not be values of the grid
+(XGBoost climbs 100, 223, 500). At every rung only the better part of the
+candidates goes on. This replaces the exhaustive ``GridSearchCV``
+(``--search grid``). The search uses five ``GroupShuffleSplit`` folds of the
+training countries, so no country is on both sides of a fold. The folds and
+the outer split are computed once per stratum and process and reused by
+every candidate. Under :func:`run` each search stays in its pool worker,
+since the pool already fills the cores; :func:`fit` called on its own
+searches on all cores.
+
+Each model is also scored by repeated grouped K-fold cross-validation
+(``--cv-folds``, ``--cv-repeats``), which adds the mean and standard
+deviation of the fold MAEs to its entry. The folds of every stratum are
+drawn once as ``int32`` row orders and shared by every model. The scaler of
+each fold comes from per-fold column sums cached with the folds, so no fold
+re-scans the training rows. The region target encodings of the test
+countries are encoded out of fold by :class:`tobacco.encoding.TargetEncoder`. The folds run in the same process pool as the models.
+"""
+
+import argparse
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, GroupShuffleSplit, HalvingGridSearchCV
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from tobacco import data, encoding, features
+
+MODEL_FILE = data.data_path("model.json")
+
+INCOME_GROUPS = ['LIC', 'LMIC', 'UMIC', 'HIC']
+TARGETS = ['Overall use', 'Male', 'Female', 'Non_age_standardised_tobacco_use',
+           'Male(Non_age_standardised_tobacco_use)', 'Female(Non_age_standardised_tobacco_use)']
+LAGGED = ['Cigarette_price', 'exposure_protect', 'cessation_support', 'risk_warning',
+          'advertisement_ban', 'tax_increase', 'media_campaign']
+POLICY_FEATURES = ['Year', 'Cigarette_price'] + data.MPOWER_POLICIES
+
+# Continents for the per-continent models; North America is too small on its own
+CONTINENTS = ['South Asia', 'Europe & Central Asia', 'Middle East & North Africa', 'Americas',
+              'East Asia & Pacific', 'Sub-Saharan Africa']
+
+PARAM_GRID_RF = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [5, 10, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4]
+}
+
+PARAM_GRID_XGB = {
+    'n_estimators': [100, 200, 500],
+    'learning_rate': [0.01, 0.05, 0.1],
+    'max_depth': [3, 5, 7],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0]
+}
+
+# model.json names; the notebook overwrote region_encoded with the leave-one-out encoding
+FEATURE_NAMES = {"region_loo": "region_encoded"}
+
+Experiment = namedtuple("Experiment", ["section", "name", "target", "features", "stratum", "estimator"])
+Experiment.__doc__ = """One model: ``stratum`` is ``None`` or a ``(column, value)`` row filter."""
+
+Result = namedtuple("Result", ["experiment", "train_mae", "test_mae", "coefficients", "params", "cv"])
+
+Folds = namedtuple("Folds", ["rows", "order", "bounds", "counts", "sums", "squares"])
+Folds.__doc__ = """Repeated grouped K-fold indices of one stratum with per-fold column sums.
+
+``rows`` are the stratum's positions in the encoded frame. ``order[r]`` lists
+the stratum rows of repeat ``r`` fold by fold, and the test rows of fold ``f``
+are ``order[r, bounds[r, f]:bounds[r, f + 1]]``. ``counts``, ``sums`` and
+``squares`` are the number of test rows and the sums of every encoded column
+and of its squares, per repeat and fold.
+"""
+
+CrossValidation = namedtuple("CrossValidation", ["train_mae", "test_mae"])
+CrossValidation.__doc__ = """Fold MAEs, each of shape ``(repeats, folds)``."""
+
+SEARCH_METHODS = ("halving", "grid")
+
+
+# -------------------------------------------
+# Encoding
+# -------------------------------------------
+def encode(merged):
+    """Encode the merged table into one float frame with every feature of every experiment.
+
+    ``Region`` and the continent (with North and Latin America merged into
+    ``Americas``) are kept as integer codes for grouping and stratifying.
+    """
+    df = merged.drop(['Objectives exist', 'Ntl agency exists', 'No. staff', 'Monitor'], axis=1).reset_index(drop=True)
+    out = pd.DataFrame({"Region": pd.factorize(df["Region"], sort=True)[0]}, dtype=float)
+    out[TARGETS + POLICY_FEATURES] = df[TARGETS + POLICY_FEATURES].astype(float)
+    out["Income Group"] = df["Income Group"].astype(str).map({g: i for i, g in enumerate(INCOME_GROUPS)}).astype(float)
+
+    continent = df["Continental Classification"].astype(str)
+    for name in sorted(continent.unique())[1:]:
+        out[f"Continental Classification_{name}"] = (continent == name).astype(float)
+    americas = continent.replace({"North America": "Americas", "Latin America & Caribbean": "Americas"})
+    out["Continent"] = americas.map({c: i for i, c in enumerate(CONTINENTS)}).astype(float)
+
+    # Target encodings of Region: the group mean, and leave-one-out as category_encoders does it
+    codes, y = out["Region"].to_numpy(dtype=np.intp), out["Overall use"].to_numpy()
+    encoder = encoding.TargetEncoder().fit(codes, y)
+    out["region_encoded"] = encoder.transform(codes)
+    out["region_loo"] = encoder.leave_one_out(codes, y)
+
+    clustered = ['Cigarette_price'] + data.MPOWER_POLICIES + ['Income Group']
+    kmeans = KMeans(n_clusters=3, random_state=42, n_init="auto")
+    out["Region_Cluster"] = kmeans.fit_predict(out[clustered]).astype(float)
+
+    # One survey round earlier; each country's first round keeps its own value, as the notebook's bfill did
+    keys = pd.MultiIndex.from_arrays([df["Region"].astype(str), df["Year"].astype(int)])
+    lagged = features.PanelFeatures(df, LAGGED).frame(lags=[2]).reindex(keys).to_numpy()
+    current = out[LAGGED].to_numpy()
+    out[[f"{var}_t-2" for var in LAGGED]] = np.where(np.isnan(lagged), current, lagged)
+    return out
+
+
+def _feature_sets(columns):
+    continents = [c for c in columns if c.startswith("Continental Classification_")]
+    base = POLICY_FEATURES + ['Income Group']
+    return {
+        "region": base + continents + ["region_encoded"],
+        "region_loo": base + continents + ["region_loo"],
+        "continent": base + continents,
+        "policies": base,
+        "clusters": base + ["Region_Cluster"],
+        "lags": base + [f"{var}_t-2" for var in LAGGED],
+        "policies_only": POLICY_FEATURES,
+    }
+
+
+# -------------------------------------------
+# Estimators and the experiment grid
+# -------------------------------------------
+def _xgboost():
+    import xgboost as xgb
+    return xgb.XGBRegressor(objective="reg:squarederror", random_state=42, n_jobs=1)
+
+
+ESTIMATORS = {
+    "linear": LinearRegression,
+    "tree": lambda: DecisionTreeRegressor(random_state=42),
+    "forest": lambda: RandomForestRegressor(random_state=42),
+}
+
+# Searched estimators and their grids
+SEARCHES = {
+    "forest_search": (lambda: RandomForestRegressor(random_state=42), PARAM_GRID_RF),
+    "xgboost_search": (_xgboost, PARAM_GRID_XGB),
+}
+
+
+def search(estimator, param_grid, folds, method="halving", n_jobs=-1):
+    """A parameter search over ``param_grid`` scored by MAE on the precomputed ``folds``.
+
+    ``method="halving"`` treats ``n_estimators`` as the budget: its smallest
+    value is the first rung and its largest the last. The rungs in between
+    are spaced geometrically, ``min * factor**i``, and need not be grid
+    values. The candidates are divided by the same ``factor`` at every rung.
+    """
+    if method == "grid":
+        return GridSearchCV(estimator, param_grid, scoring='neg_mean_absolute_error', cv=folds, n_jobs=n_jobs)
+    if method != "halving":
+        raise ValueError(f"method must be one of {SEARCH_METHODS}, got {method!r}")
+    grid = dict(param_grid)
+    budget = sorted(grid.pop("n_estimators"))
+    factor = (budget[-1] / budget[0]) ** (1 / (len(budget) - 1))
+    return HalvingGridSearchCV(estimator, grid, resource="n_estimators", min_resources=budget[0],
+                               max_resources=budget[-1], factor=factor, scoring='neg_mean_absolute_error',
+                               cv=folds, n_jobs=n_jobs, random_state=42)
+
+
+def default_grid():
+    """Every model behind ``model.json``, in the order the page lists them."""
+    variants = [("Initial Model", "region"), ("Models Without Region", "continent"),
+                ("Without Region or Continent", "policies")]
+    grid = [Experiment("Linear Regression", "Initial Model", "Overall use", "region", None, "linear"),
+            Experiment("Linear Regression", "Leave One Out Encoded", "Overall use", "region_loo", None, "linear"),
+            Experiment("Linear Regression", "Models Without Region", "Overall use", "continent", None, "linear"),
+            Experiment("Linear Regression", "Without Region or Continent", "Overall use", "policies", None, "linear"),
+            Experiment("Linear Regression", "Clusters", "Overall use", "clusters", None, "linear"),
+            Experiment("Linear Regression", "Lag", "Overall use", "lags", None, "linear")]
+    grid += [Experiment("Decision Tree Regressor", name, "Overall use", features, None, "tree")
+             for name, features in variants]
+    grid += [Experiment("Random Forest Regressor", name, "Overall use", features, None, "forest")
+             for name, features in variants]
+    grid += [Experiment("Random Forest Regressor", "Optimised", "Overall use", "policies", None, "forest_search"),
+             Experiment("Gender", "Female", "Female", "policies", None, "linear"),
+             Experiment("Gender", "Male", "Male", "policies", None, "linear"),
+             Experiment("XGBoost", "Optmised", "Overall use", "policies", None, "xgboost_search"),
+             Experiment("Income", "High Income Group", "Overall use", "policies_only", ("Income Group", 3), "linear"),
+             Experiment("Income", "Low Income Group", "Overall use", "policies_only", ("Income Group", 0), "linear")]
+    grid += [Experiment("Continent", name, "Overall use", "policies_only", ("Continent", i), "linear")
+             for i, name in enumerate(CONTINENTS)]
+    return grid
+
+
+# -------------------------------------------
+# Workers
+# -------------------------------------------
+_shared = {}
+_splits = {}
+
+
+def _attach(spec, folds=None):
+    """Pool initializer: map the shared encoded matrix into this worker."""
+    name, shape, columns = spec
+    shm = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _shared["shm"] = shm
+    _shared["frame"] = pd.DataFrame(matrix, columns=columns, copy=False)
+    _shared["folds"] = folds or {}
+
+
+def splits(encoded, stratum, test_size=0.2, random_state=42, n_folds=5):
+    """Row positions, the outer train/test split and the inner search folds of one stratum.
+
+    Cached per process: every experiment on the same stratum reuses them.
+    The inner folds index into the training rows.
+    """
+    key = (stratum, len(encoded), test_size, random_state, n_folds)
+    if key not in _splits:
+        rows = np.arange(len(encoded))
+        if stratum is not None:
+            column, value = stratum
+            rows = np.flatnonzero(encoded[column].to_numpy() == value)
+        groups = encoded["Region"].to_numpy()[rows]
+        # The notebook looped over the splitter's default five splits and kept the last one
+        splitter = GroupShuffleSplit(test_size=test_size, random_state=random_state)
+        train_idx, test_idx = list(splitter.split(rows, groups=groups))[-1]
+        inner = GroupShuffleSplit(n_splits=n_folds, test_size=test_size, random_state=random_state)
+        folds = list(inner.split(train_idx, groups=groups[train_idx]))
+        _splits[key] = (rows, train_idx, test_idx, folds)
+    return _splits[key]
+
+
+def fit(encoded, experiment, test_size=0.2, random_state=42, search_method="halving", n_jobs=-1):
+    """Fit one experiment on the encoded frame the way the notebook's ``train_model`` did.
+
+    ``n_jobs`` is passed to the parameter search of the optimised models.
+    """
+    rows, train_idx, test_idx, folds = splits(encoded, experiment.stratum, test_size, random_state)
+    features = _feature_sets(encoded.columns)[experiment.features]
+    X = encoded[features].to_numpy()[rows]
+    y = encoded[experiment.target].to_numpy()[rows]
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+
+    if experiment.estimator in SEARCHES:
+        estimator, param_grid = SEARCHES[experiment.estimator]
+        model = search(estimator(), param_grid, folds, search_method, n_jobs)
+    else:
+        model = ESTIMATORS[experiment.estimator]()
+    model.fit(X_train, y[train_idx])
+    params = None
+    if isinstance(model, (GridSearchCV, HalvingGridSearchCV)):
+        params = model.best_estimator_.get_params()
+        params = {name: params[name] for name in SEARCHES[experiment.estimator][1]}
+        model = model.best_estimator_
+    train_mae = mean_absolute_error(y[train_idx], model.predict(X_train))
+    test_mae = mean_absolute_error(y[test_idx], model.predict(X_test))
+
+    coefficients = None
+    if isinstance(model, LinearRegression):
+        names = [FEATURE_NAMES.get(f, f) for f in features]
+        coefficients = pd.Series(model.coef_, names).sort_values(key=abs, ascending=False)
+    return Result(experiment, train_mae, test_mae, coefficients, params, None)
+
+
+def _fit_shared(job):
+    experiment, search_method = job
+    # The pool already runs one experiment per core, so the search stays in this worker
+    return fit(_shared["frame"], experiment, search_method=search_method, n_jobs=1)
+
+
+# -------------------------------------------
+# Cross-validation
+# -------------------------------------------
+def make_folds(encoded, stratum, n_folds=5, repeats=3, random_state=42):
+    """Draw ``repeats`` grouped K-fold partitions of one stratum's countries."""
+    rows = np.arange(len(encoded), dtype=np.int32)
+    if stratum is not None:
+        column, value = stratum
+        rows = np.flatnonzero(encoded[column].to_numpy() == value).astype(np.int32)
+    groups = pd.factorize(encoded["Region"].to_numpy()[rows])[0]
+    n_groups = groups.max() + 1
+    values = encoded.to_numpy()[rows]
+
+    rng = np.random.default_rng(random_state)
+    order = np.empty((repeats, len(rows)), dtype=np.int32)
+    bounds = np.empty((repeats, n_folds + 1), dtype=np.int32)
+    counts = np.empty((repeats, n_folds))
+    sums = np.empty((repeats, n_folds, values.shape[1]))
+    squares = np.empty_like(sums)
+    for r in range(repeats):
+        # Shuffled countries dealt round-robin into the folds
+        group_fold = np.empty(n_groups, dtype=np.int32)
+        group_fold[rng.permutation(n_groups)] = np.arange(n_groups) % n_folds
+        fold = group_fold[groups]
+        order[r] = np.argsort(fold, kind="stable")
+        bounds[r] = np.searchsorted(fold[order[r]], np.arange(n_folds + 1))
+        counts[r] = np.bincount(fold, minlength=n_folds)
+        for j, col in enumerate(values.T):
+            sums[r, :, j] = np.bincount(fold, weights=col, minlength=n_folds)
+            squares[r, :, j] = np.bincount(fold, weights=col * col, minlength=n_folds)
+    return Folds(rows, order, bounds, counts, sums, squares)
+
+
+def fold_split(folds, repeat, fold):
+    """Train and test positions (into ``folds.rows``) of one fold."""
+    order, (start, stop) = folds.order[repeat], folds.bounds[repeat, fold:fold + 2]
+    return np.concatenate([order[:start], order[stop:]]), order[start:stop]
+
+
+def fold_ids(folds, repeat):
+    """The fold number of every stratum row in one repeat."""
+    ids = np.empty(len(folds.rows), dtype=np.int32)
+    ids[folds.order[repeat]] = np.repeat(np.arange(folds.bounds.shape[1] - 1), np.diff(folds.bounds[repeat]))
+    return ids
+
+
+def _training_moments(folds, repeat, fold):
+    """Column means and population variances of the training rows of one fold."""
+    n = folds.counts[repeat].sum() - folds.counts[repeat, fold]
+    total = folds.sums[repeat].sum(axis=0) - folds.sums[repeat, fold]
+    total_sq = folds.squares[repeat].sum(axis=0) - folds.squares[repeat, fold]
+    mean = total / n
+    return mean, np.maximum(total_sq / n - mean ** 2, 0.0)
+
+
+def cross_validate_fold(encoded, experiment, folds, repeat, fold, params=None):
+    """Train and test MAE of one experiment on one fold."""
+    columns = list(encoded.columns)
+    features = _feature_sets(columns)[experiment.features]
+    cols = [columns.index(f) for f in features]
+    train_idx, test_idx = fold_split(folds, repeat, fold)
+    values = encoded.to_numpy()
+    X = values[folds.rows][:, cols]
+    y = values[folds.rows, columns.index(experiment.target)]
+
+    mean, var = _training_moments(folds, repeat, fold)
+    X_test = X[test_idx]
+    encoded_region = [name for name in ("region_encoded", "region_loo") if name in features]
+    if encoded_region:
+        regions = values[folds.rows, columns.index("Region")].astype(np.intp)
+        y_region = values[folds.rows, columns.index("Overall use")]
+        oof = encoding.TargetEncoder().out_of_fold(regions, y_region, fold_ids(folds, repeat))
+        for name in encoded_region:
+            X_test[:, features.index(name)] = oof[test_idx]
+    scale = np.sqrt(var[cols])
+    scale[scale == 0] = 1.0
+    X_train = (X[train_idx] - mean[cols]) / scale
+    X_test = (X_test - mean[cols]) / scale
+
+    if experiment.estimator in SEARCHES:
+        model = SEARCHES[experiment.estimator][0]().set_params(**params)
+    else:
+        model = ESTIMATORS[experiment.estimator]()
+    model.fit(X_train, y[train_idx])
+    return (mean_absolute_error(y[train_idx], model.predict(X_train)),
+            mean_absolute_error(y[test_idx], model.predict(X_test)))
+
+
+def _cross_validate_shared(job):
+    experiment, params, repeat, fold = job
+    folds = _shared["folds"][experiment.stratum]
+    return cross_validate_fold(_shared["frame"], experiment, folds, repeat, fold, params)
+
+
+def available(experiment):
+    """False for experiments whose estimator needs a package that is not installed."""
+    if experiment.estimator != "xgboost_search":
+        return True
+    try:
+        import xgboost  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@data.cached(data.data_path("merged_tobacco_data.csv"))
+def load_encoded():
+    """The encoded merged table, built once per process."""
+    return encode(data.load_merged())
+
+
+def run(grid=None, workers=None, search_method="halving", cv_folds=5, cv_repeats=3):
+    """Fit every experiment of ``grid`` on a process pool and return the results in grid order.
+
+    With ``cv_repeats > 0`` every experiment is also cross-validated; searched
+    models are cross-validated with the parameters their search chose.
+    """
+    grid = default_grid() if grid is None else grid
+    encoded = load_encoded()
+    matrix = encoded.to_numpy(dtype=np.float64)
+    folds = {}
+    if cv_repeats:
+        folds = {stratum: make_folds(encoded, stratum, cv_folds, cv_repeats)
+                 for stratum in dict.fromkeys(e.stratum for e in grid)}
+
+    shm = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    try:
+        np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+        spec = (shm.name, matrix.shape, list(encoded.columns))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(spec, folds)) as pool:
+            results = list(pool.map(_fit_shared, [(e, search_method) for e in grid]))
+            if not cv_repeats:
+                return results
+            jobs = [(r.experiment, r.params, repeat, fold)
+                    for r in results for repeat in range(cv_repeats) for fold in range(cv_folds)]
+            maes = np.array(list(pool.map(_cross_validate_shared, jobs))).reshape(
+                len(results), cv_repeats, cv_folds, 2)
+    finally:
+        shm.close()
+        shm.unlink()
+    return [r._replace(cv=CrossValidation(m[..., 0], m[..., 1])) for r, m in zip(results, maes)]
+
+
+def write(results, path=MODEL_FILE):
+    """Update ``path`` with ``results``, keeping the entries of models that were not rerun."""
+    model_results = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            model_results = json.load(f)
+    for result in results:
+        entry = {"Train MAE": round(result.train_mae, 2), "Test MAE": round(result.test_mae, 2)}
+        if result.coefficients is not None:
+            entry["Feature Importance"] = result.coefficients.to_dict()
+        if result.params is not None:
+            entry["Best Parameters"] = result.params
+        if result.cv is not None:
+            entry["CV Train MAE"] = round(float(result.cv.train_mae.mean()), 2)
+            entry["CV Test MAE"] = round(float(result.cv.test_mae.mean()), 2)
+            entry["CV Test MAE SD"] = round(float(result.cv.test_mae.std(ddof=1)), 2)
+        model_results.setdefault(result.experiment.section, {})[result.experiment.name] = entry
+    with open(path, "w") as f:
+        json.dump(model_results, f, indent=4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train every model behind model.json")
+    parser.add_argument("--out", default=MODEL_FILE, help="results file to update")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--only", nargs="+", metavar="SECTION", help="only rerun these model.json sections")
+    parser.add_argument("--search", choices=SEARCH_METHODS, default="halving",
+                        help="parameter search for the optimised models")
+    parser.add_argument("--cv-folds", type=int, default=5, help="folds per cross-validation repeat")
+    parser.add_argument("--cv-repeats", type=int, default=3, help="cross-validation repeats (0 to skip)")
+    args = parser.parse_args()
+
+    grid = [e for e in default_grid() if args.only is None or e.section in args.only]
+    skipped = [e for e in grid if not available(e)]
+    for e in skipped:
+        print(f"skipping {e.section} / {e.name}: estimator '{e.estimator}' is not installed "
+              f"(pip install -r requirements.txt); its {args.out} entry is kept as it was")
+    results = run([e for e in grid if e not in skipped], args.workers, args.search, args.cv_folds, args.cv_repeats)
+    for r in results:
+        line = f"{r.experiment.section} / {r.experiment.name}: train {r.train_mae:.2f}, test {r.test_mae:.2f}"
+        if r.cv is not None:
+            line += f", CV test {r.cv.test_mae.mean():.2f} ± {r.cv.test_mae.std(ddof=1):.2f}"
+        print(line)
+    write(results, args.out)
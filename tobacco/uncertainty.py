@@ -0,0 +1,184 @@
+"""Propagate the WHO prevalence intervals through the stratified policy models.
+
+Run it with::
+
+    python -m tobacco.uncertainty [--draws 1000] [--seed 2024] [--shared] [--out Data/policy_uncertainty.csv]
+
+WHO publishes every prevalence estimate with an uncertainty interval
+(:mod:`tobacco.estimates`), but the fixed-effects models of
+:mod:`tobacco.stratified` treat the outcomes as exact. This module draws
+``--draws`` realisations of every outcome from its interval, refits each
+model on every draw and combines the two sources of uncertainty.
+
+Measurement errors
+    The intervals are read as 95% intervals of a split normal, so the point
+    can sit off-centre. Only the non-age-standardised table has intervals.
+    The relative half-widths of each country, year and group are therefore
+    interpolated onto the panel years with :func:`tobacco.interpolation.interpolate`
+    and applied to the model outcomes. Countries without intervals are
+    treated as exact. By default, draws are independent across
+    country-years. ``--shared`` gives each country one draw for all its
+    years. That spread is mostly absorbed by the country fixed effect, so
+    independent draws are the wider of the two.
+
+Refits
+    Only the outcome changes between draws. The demeaned regressors ``X`` are
+    orthogonal to the fixed effects, so the coefficients of ``y + e`` are
+    ``β̂ + A e`` with ``A = (X'X)⁺ X'``. ``A`` is computed once per stratum,
+    and a batch of draws costs one ``(k × n) @ (n × batch)`` product; the
+    errors need no demeaning.
+
+Combination
+    Each draw is given the point fit's sampling error (cluster-robust, or HC3
+    where a stratum has too few countries) by adding a draw from its
+    covariance. The spread of these combined draws is the coefficient
+    distribution. Its standard error follows Rubin's rules:
+    ``T = V + (1 + 1/m) B``.
+"""
+
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from tobacco import data, fixed_effects, interpolation, stratified
+
+DRAWS = 1000
+BATCH = 250
+Z95 = stats.norm.ppf(0.975)
+
+# Statistical panel outcome -> prevalence group with intervals
+GROUPS = {"Overall_use": "Overall use", "Male": "Male", "Female": "Female"}
+
+Draws = namedtuple("Draws", ["key", "regressors", "point", "measurement", "combined", "measured"])
+Draws.__doc__ = """Coefficient draws of one model: ``measurement`` refits the drawn outcomes, ``combined`` adds sampling error."""
+
+
+# -------------------------------------------
+# Measurement errors
+# -------------------------------------------
+@data.cached(data.data_path("Non_age_standardised_smoking_prevalence.csv"))
+def relative_widths(years=tuple(range(2008, 2023, 2))):
+    """Relative lower and upper 95% half-widths of every group on ``years`` (a :class:`~tobacco.interpolation.Panel`)."""
+    prevalence = data.load_prevalence()
+    # The merged panel spells Türkiye without the umlaut
+    table = pd.DataFrame({"Region": prevalence["Region"].astype(str).replace("Türkiye", "Turkiye"),
+                          "Year": prevalence["Year"]})
+    for group in data.PREVALENCE_GROUPS:
+        point = prevalence[group].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table[f"{group} lower"] = (point - prevalence[f"{group} Low"].to_numpy(dtype=float)) / point
+            table[f"{group} upper"] = (prevalence[f"{group} High"].to_numpy(dtype=float) - point) / point
+    grid = np.union1d(table["Year"].unique(), years)
+    panel = interpolation.interpolate(interpolation.align([table], years=grid), method="index")
+    keep = np.isin(panel.years, years)
+    return panel._replace(years=panel.years[keep], values=panel.values[:, keep], flags=panel.flags[:, keep])
+
+
+def scales(df, outcomes):
+    """Standard deviations below and above every outcome of ``df``, each an ``(n, len(outcomes))`` array.
+
+    Rows without an interval get zero.
+    """
+    panel = relative_widths()
+    regions = df["Region"].astype(str).to_numpy(dtype=object)
+    r = np.clip(np.searchsorted(panel.regions, regions), 0, len(panel.regions) - 1)
+    t = np.clip(np.searchsorted(panel.years, df["Year"].to_numpy()), 0, len(panel.years) - 1)
+    found = (panel.regions[r] == regions) & (panel.years[t] == df["Year"].to_numpy())
+    lower = np.zeros((len(df), len(outcomes)))
+    upper = np.zeros((len(df), len(outcomes)))
+    for j, outcome in enumerate(outcomes):
+        y = df[outcome].to_numpy(dtype=float)
+        for out, side in ((lower, "lower"), (upper, "upper")):
+            relative = panel.values[r, t, panel.columns.index(f"{GROUPS[outcome]} {side}")]
+            out[:, j] = np.where(found & np.isfinite(relative), np.abs(y) * relative / Z95, 0.0)
+    return lower, upper
+
+
+def draw_errors(rng, lower, upper, size, groups=None):
+    """A ``(len(lower), size)`` matrix of split-normal measurement errors.
+
+    Rows with the same ``groups`` code share their standard normal draw.
+    """
+    if groups is None:
+        z = rng.standard_normal((len(lower), size))
+    else:
+        z = rng.standard_normal((int(groups.max()) + 1, size))[groups]
+    return np.where(z < 0, lower[:, None], upper[:, None]) * z
+
+
+# -------------------------------------------
+# Refits
+# -------------------------------------------
+def _sampling_root(cov):
+    """A matrix ``L`` with ``L L' = cov`` for a positive semi-definite ``cov``."""
+    w, V = np.linalg.eigh(cov)
+    return V * np.sqrt(np.clip(w, 0, None))
+
+
+def draws(df=None, specs=stratified.SPECS, n_draws=DRAWS, seed=2024, batch=BATCH, shared=False):
+    """Yield the :class:`Draws` of every stratum and outcome of ``specs``.
+
+    ``shared=True`` draws one error per country and model, shared by its years.
+    """
+    df = data.load_statistical_panel() if df is None else df
+    rng = np.random.default_rng(seed)
+    for spec in specs:
+        n_out = len(spec.outcomes)
+        lower, upper = scales(df, spec.outcomes)
+        for design in stratified.designs(df, spec):
+            X = design.within[:, n_out:]
+            # β(y + e) = β(y) + A e for every outcome and draw
+            A = np.linalg.pinv(X.T @ X) @ X.T
+            rows = df.index.get_indexer(design.rows)
+            for j, outcome in enumerate(spec.outcomes):
+                fit = fixed_effects.estimate(design.raw[:, j], design.within[:, j], X, list(spec.regressors),
+                                             design.codes, design.cov_type, design.clusters)
+                point = fit.params.to_numpy()
+                measurement = np.empty((n_draws, len(point)))
+                for start in range(0, n_draws, batch):
+                    size = min(batch, n_draws - start)
+                    errors = draw_errors(rng, lower[rows, j], upper[rows, j], size, design.clusters if shared else None)
+                    measurement[start:start + size] = (point[:, None] + A @ errors).T
+                sampling = rng.standard_normal((n_draws, len(point))) @ _sampling_root(fit.cov.to_numpy()).T
+                measured = int(np.count_nonzero(upper[rows, j]))
+                yield Draws((spec.name, outcome, design.stratum), list(spec.regressors), fit,
+                            measurement, measurement + sampling, measured)
+
+
+def summarise(d):
+    """One row per regressor of :class:`Draws` ``d`` with the combined estimate and interval."""
+    m = len(d.measurement)
+    between = d.measurement.var(axis=0, ddof=1)
+    total = np.sqrt(d.point.bse.to_numpy() ** 2 + (1 + 1 / m) * between)
+    mean = d.measurement.mean(axis=0)
+    low, high = np.percentile(d.combined, [2.5, 97.5], axis=0)
+    stratification, outcome, stratum = d.key
+    return pd.DataFrame({
+        "Stratification": stratification, "Outcome": outcome, "Stratum": stratum, "Variable": d.regressors,
+        "Mean Coefficient": mean,
+        "Measurement SD": np.sqrt(between),
+        "Total Std. Error": total,
+        "Uncertainty P-Value": 2 * stats.norm.sf(np.abs(mean) / total),
+        "Combined 2.5%": low, "Combined 97.5%": high,
+        "Draws": m, "Measured Rows": d.measured,
+    })
+
+
+def run(n_draws=DRAWS, seed=2024, shared=False, df=None):
+    """Propagate the intervals through every model and return one row per coefficient."""
+    return pd.concat([summarise(d) for d in draws(df, n_draws=n_draws, seed=seed, shared=shared)], ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propagate the WHO prevalence intervals through the policy models")
+    parser.add_argument("--draws", type=int, default=DRAWS, help="outcome realisations per model")
+    parser.add_argument("--seed", type=int, default=2024, help="random seed")
+    parser.add_argument("--shared", action="store_true", help="one draw per country, shared by its years")
+    parser.add_argument("--out", default=data.data_path(stratified.UNCERTAINTY_FILE), help="results file")
+    args = parser.parse_args()
+    results = run(args.draws, args.seed, args.shared)
+    results.to_csv(args.out, index=False)
+    print(results[results["Uncertainty P-Value"] < 0.1].to_string(index=False))
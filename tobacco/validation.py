@@ -0,0 +1,100 @@
+"""Leave-one-year-out validation of the interpolation used in the merge.
+
+Run it with::
+
+    python -m tobacco.validation [--out Data] [--workers N]
+
+Each table is restricted to the survey years the merge keeps. Every interior
+year of a table (one with observations on both sides) is then hidden and
+interpolated back with every method, and all columns are compared with the
+real values. The (table, method, year) jobs run in a process pool. Two
+reports are written:
+
+``interpolation_validation.csv``
+    one row per table, column, method and year, with the number of regions
+    and the mean and max absolute error
+``interpolation_validation_regions.csv``
+    the real value, the interpolated value and the error for every region
+    in every job
+
+Page 04 reads these files instead of interpolating on every rerun.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from tobacco import data, interpolation
+
+METHODS = ["linear", "index"]
+
+SUMMARY_FILE = "interpolation_validation.csv"
+REGIONS_FILE = "interpolation_validation_regions.csv"
+
+
+def validation_panels():
+    """The panels to validate, keyed by table name."""
+    age = data.load_prevalence_standardised()
+    age = age[(age["Year"] >= 2007) & (age["Year"] <= 2022) & (age["Year"] != 2021)]
+    nonage = data.load_prevalence()
+    nonage = nonage[(nonage["Year"] >= 2007) & (nonage["Year"] <= 2022) & (nonage["Year"] != 2021)]
+    price = data.load_price()
+    return {
+        "Age standardised": interpolation.align([age[["Region", "Year"] + interpolation.STANDARDISED_COLUMNS]]),
+        "Non-age standardised": interpolation.align([nonage[["Region", "Year"] + interpolation.STANDARDISED_COLUMNS]]),
+        "Cigarette price": interpolation.align([price[["Region", "Year", "Cigarette_price"]]]),
+    }
+
+
+def _run_job(job):
+    name, panel, method, year = job
+    result = interpolation.holdout(panel, year, method)
+    frames = []
+    for col in panel.columns:
+        frame = pd.DataFrame({
+            "Table": name, "Column": col, "Method": method, "Year": year,
+            "Region": result["Region"],
+            "Real": result[col],
+            "Interpolated": result[f"{col} ({year} interpolated)"],
+            "Error": result[f"{col} difference"],
+        })
+        frames.append(frame.dropna(subset=["Error"]))
+    return pd.concat(frames, ignore_index=True)
+
+
+def jobs(panels, methods=METHODS):
+    """One (table, panel, method, year) job for every interior year of every panel."""
+    for name, panel in panels.items():
+        for year in panel.years[1:-1]:
+            for method in methods:
+                yield name, panel, method, int(year)
+
+
+def summarize(regions):
+    """Mean and max error per table, column, method and year."""
+    grouped = regions.groupby(["Table", "Column", "Method", "Year"], sort=False)["Error"]
+    summary = grouped.agg(["size", "mean", "max"]).reset_index()
+    return summary.rename(columns={"size": "Regions", "mean": "Mean error", "max": "Max error"})
+
+
+def run(out_dir=data.DATA_DIR, workers=None):
+    """Run every job in a process pool and write both reports to ``out_dir``."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_job, jobs(validation_panels())))
+    regions = pd.concat(results, ignore_index=True)
+    summary = summarize(regions)
+    regions[["Real", "Interpolated", "Error"]] = regions[["Real", "Interpolated", "Error"]].round(4)
+    summary[["Mean error", "Max error"]] = summary[["Mean error", "Max error"]].round(4)
+    summary.to_csv(os.path.join(out_dir, SUMMARY_FILE), index=False)
+    regions.to_csv(os.path.join(out_dir, REGIONS_FILE), index=False)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leave-one-year-out interpolation validation")
+    parser.add_argument("--out", default=data.DATA_DIR, help="directory for the report files")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+    print(run(args.out, args.workers).to_string(index=False))
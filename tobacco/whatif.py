@@ -0,0 +1,194 @@
+"""Live what-if fixed-effects fits for the Statistical page.
+
+The notebook answered every new question, such as another policy subset, an
+interaction, one income group or a shorter period, with a fresh ``smf.ols``
+run. :class:`WhatIf` answers them interactively:
+
+* the statistical panel is packed once into a :class:`CompactPanel`, which
+  holds one float matrix of outcomes, policies and the notebook's interaction
+  terms, plus small integer codes for regions, years and strata;
+* the within-transformed design is computed once per stratification and year
+  range, with the fixed effects interacted with the stratum as in
+  :mod:`tobacco.stratified`. A query then only selects columns and rows and
+  solves a ``k × k`` system;
+* fitted results are kept in an LRU cache keyed on the normalized
+  :class:`Query`, so revisiting a selection costs nothing.
+
+The designs for the full year range are built when the engine is created;
+other year ranges are demeaned on first use. :func:`load_engine` keeps one
+engine per process and rebuilds it when the merged table changes.
+"""
+
+import functools
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tobacco import data, fixed_effects
+from tobacco.stratified import OUTCOMES, POLICIES
+
+# Interaction terms tried in the notebook, as products of two policy columns
+INTERACTIONS = {
+    "media_warning": ("media_campaign", "risk_warning"),
+    "tax_price": ("tax_increase", "Cigarette_price"),
+    "protect_warning": ("exposure_protect", "risk_warning"),
+    "protect_adban": ("exposure_protect", "advertisement_ban"),
+    "cessation_warning": ("cessation_support", "risk_warning"),
+    "warning_adban": ("risk_warning", "advertisement_ban"),
+    "price_adban": ("Cigarette_price", "advertisement_ban"),
+    "adban_media": ("advertisement_ban", "media_campaign"),
+}
+
+STRATIFICATIONS = {"Pooled": None, "Income Group": "Income_Group", "Continent": "Continental_Classification"}
+
+MIN_CLUSTERS = 10
+
+Query = namedtuple("Query", ["outcome", "policies", "interactions", "stratification", "stratum",
+                             "years", "cov_type"])
+Query.__doc__ = """A normalized what-if specification; build it with :func:`query`."""
+
+CompactPanel = namedtuple("CompactPanel", ["columns", "values", "regions", "years", "strata"])
+CompactPanel.__doc__ = """The statistical panel packed for repeated fits.
+
+``values`` is an ``(n, k)`` float matrix with one column per name in
+``columns``. ``regions`` and ``years`` are integer codes and raw years of the
+``n`` rows, and ``strata`` maps every stratification column to its
+``(codes, labels)``.
+"""
+
+Design = namedtuple("Design", ["rows", "strata", "codes", "within"])
+
+
+def query(outcome="Overall_use", policies=POLICIES, interactions=(), stratification="Pooled", stratum=None,
+          years=None, cov_type="cluster"):
+    """Validate a what-if specification and put it in canonical form.
+
+    Policies and interactions are kept in the order of :data:`POLICIES` and
+    :data:`INTERACTIONS`, so the same selection always gives the same cache
+    key. ``years`` is an inclusive ``(first, last)`` pair or ``None`` for all
+    years.
+    """
+    if outcome not in OUTCOMES:
+        raise ValueError(f"outcome must be one of {OUTCOMES}, got {outcome!r}")
+    unknown = set(policies) - set(POLICIES) | set(interactions) - set(INTERACTIONS)
+    if unknown:
+        raise ValueError(f"unknown regressors: {sorted(unknown)}")
+    if not policies and not interactions:
+        raise ValueError("select at least one policy or interaction")
+    if stratification not in STRATIFICATIONS:
+        raise ValueError(f"stratification must be one of {list(STRATIFICATIONS)}, got {stratification!r}")
+    if STRATIFICATIONS[stratification] is None:
+        stratum = None
+    elif stratum is None:
+        raise ValueError(f"choose a stratum of {stratification}")
+    if cov_type not in fixed_effects.COV_TYPES:
+        raise ValueError(f"cov_type must be one of {fixed_effects.COV_TYPES}, got {cov_type!r}")
+    return Query(
+        outcome,
+        tuple(p for p in POLICIES if p in policies),
+        tuple(i for i in INTERACTIONS if i in interactions),
+        stratification,
+        stratum,
+        None if years is None else (int(years[0]), int(years[1])),
+        cov_type,
+    )
+
+
+def compact(df):
+    """Pack the statistical panel into a :class:`CompactPanel`."""
+    columns = OUTCOMES + POLICIES + list(INTERACTIONS)
+    values = np.empty((len(df), len(columns)))
+    base = df[OUTCOMES + POLICIES].to_numpy(dtype=float)
+    values[:, :len(base.T)] = base
+    for j, (a, b) in enumerate(INTERACTIONS.values(), start=len(base.T)):
+        values[:, j] = base[:, columns.index(a)] * base[:, columns.index(b)]
+    strata = {}
+    for by in STRATIFICATIONS.values():
+        if by is not None:
+            codes, labels = pd.factorize(df[by], sort=True)
+            strata[by] = (codes.astype(np.int8), list(labels))
+    return CompactPanel(
+        columns=columns,
+        values=values,
+        regions=pd.factorize(df["Region"], sort=True)[0].astype(np.int16),
+        years=df["Year"].to_numpy(dtype=np.int16),
+        strata=strata,
+    )
+
+
+def _recode(codes):
+    return np.unique(codes, return_inverse=True)[1]
+
+
+class WhatIf:
+    """Fixed-effects fits of arbitrary policy subsets on a precomputed within design."""
+
+    def __init__(self, df, cache_size=256):
+        self.panel = compact(df)
+        self.year_range = (int(self.panel.years.min()), int(self.panel.years.max()))
+        self._designs = {}
+        for by in STRATIFICATIONS.values():
+            self.design(by, None)
+        self.fit = functools.lru_cache(maxsize=cache_size)(self._fit)
+
+    def strata(self, stratification):
+        """The strata of a stratification, in display order."""
+        by = STRATIFICATIONS[stratification]
+        return [] if by is None else self.panel.strata[by][1]
+
+    def design(self, by, years):
+        """Rows, stratum codes, fixed-effect codes and the demeaned matrix for one stratification and period."""
+        if years is not None and years[0] <= self.year_range[0] and years[1] >= self.year_range[1]:
+            years = None
+        key = (by, years)
+        if key not in self._designs:
+            panel = self.panel
+            if years is None:
+                rows = np.arange(len(panel.values))
+            else:
+                rows = np.flatnonzero((panel.years >= years[0]) & (panel.years <= years[1]))
+            strata = panel.strata[by][0][rows] if by else np.zeros(len(rows), dtype=np.int8)
+            codes = [_recode(strata.astype(np.int64) * 10000 + level[rows])
+                     for level in (panel.regions, panel.years)]
+            within = fixed_effects.demean(panel.values[rows], codes) if len(rows) else panel.values[rows]
+            self._designs[key] = Design(rows, strata, codes, within)
+        return self._designs[key]
+
+    def _fit(self, q):
+        panel = self.panel
+        by = STRATIFICATIONS[q.stratification]
+        design = self.design(by, q.years)
+        if by is None:
+            selected = np.arange(len(design.rows))
+        else:
+            labels = panel.strata[by][1]
+            if q.stratum not in labels:
+                raise ValueError(f"{q.stratum!r} is not a stratum of {q.stratification}")
+            selected = np.flatnonzero(design.strata == labels.index(q.stratum))
+
+        regressors = list(q.policies) + list(q.interactions)
+        if len(selected) <= len(regressors):
+            raise ValueError("too few observations for this selection")
+        y_col = panel.columns.index(q.outcome)
+        x_cols = [panel.columns.index(r) for r in regressors]
+        rows = design.rows[selected]
+        codes = [_recode(c[selected]) for c in design.codes]
+        clusters = _recode(panel.regions[rows])
+        cov_type = q.cov_type
+        if cov_type == "cluster" and clusters.max() + 1 < MIN_CLUSTERS:
+            cov_type = "HC3"
+        within = design.within[selected]
+        if fixed_effects.residual_dof(within[:, x_cols], codes) <= 0:
+            raise ValueError("no residual degrees of freedom left after the fixed effects; widen the selection")
+        return fixed_effects.estimate(panel.values[rows, y_col], within[:, y_col], within[:, x_cols],
+                                      regressors, codes, cov_type, clusters, rows)
+
+    def run(self, **spec):
+        """Fit the model described by the keyword arguments of :func:`query`."""
+        return self.fit(query(**spec))
+
+
+@data.cached(data.data_path("merged_tobacco_data.csv"))
+def load_engine():
+    return WhatIf(data.load_statistical_panel())